@@ -884,7 +884,22 @@ function toggleMetric(key) {
   renderView();
 }
 
+const NWS_API = "https://api.weather.gov/";
+// Route NWS requests through the server's shared cache (/proxy/nws/) while it answers.
+let useProxy = true;
+
 async function fetchJson(url) {
+  if (useProxy && url.startsWith(NWS_API)) {
+    try {
+      const res = await fetch(`proxy/nws/${url.slice(NWS_API.length)}`);
+      if (res.ok) return res.json();
+      // The proxy tags its responses; anything else means there is no proxy here (e.g. static hosting).
+      if (res.headers.has("X-Cache")) throw new Error(`Request failed: ${res.status}`);
+    } catch (err) {
+      if (err.message.startsWith("Request failed")) throw err;
+    }
+    useProxy = false;
+  }
   const res = await fetch(url, {
     headers: { "User-Agent": "focused-forecast-demo" }
   });
@@ -2,23 +2,52 @@
 
 from __future__ import annotations
 
-import json
 import logging
+import math
 import os
 import tempfile
 import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, Optional
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent  # app/background.py → app/ → project/
 
 from .config import (
+    ENABLE_DEMAND_REFRESH,
+    ENABLE_GRID_RESOLVER,
+    ENABLE_HISTORY,
     ENABLE_HRRR,
+    GRID_RESOLVER_FILE,
+    HISTORY_DB,
     HRRR_CACHE_DIR,
     HRRR_INTERVAL_SECONDS,
+    HRRR_PARTIAL_INTERVAL_SECONDS,
     LOCATIONS,
+    NWS_ACTIVE_INTERVAL_SECONDS,
+    NWS_CYCLE_BUDGET_SECONDS,
+    NWS_HEDGE_QUANTILE,
+    NWS_HOURLY_FROM_GRID,
+    NWS_IDLE_INTERVAL_SECONDS,
     NWS_INTERVAL_SECONDS,
+    NWS_LOCATION_BUDGET_SECONDS,
+    NWS_PROCESS_WORKERS,
+    NWS_RETRY_INITIAL_SECONDS,
+    NWS_RETRY_MAX_SECONDS,
+    PROFILE_PATH,
+    SNAPSHOT_FLOAT_DIGITS,
+    SNAPSHOT_SERIALIZER,
 )
-from .nws_fetcher import fetch_all_locations
+from .deadline import LatencyTracker
+from .demand import get_demand
+from .grids import get_resolver
+from .history import ForecastArchive
+from .metrics import SNAPSHOT_BYTES, SNAPSHOT_WRITE_SECONDS
+from .nws_fetcher import failed_locations, fetch_all_locations, refresh_locations, retry_locations
+from .profiling import span, trace
+from .serialize import get_serializer, stream_snapshot
+from .snapshots import get_store
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +57,12 @@ LOCATIONS_FILE = DATA_DIR / "locations.json"
 
 
 def write_json_atomic(data: dict, path: Path) -> None:
-    """Write JSON atomically using temp file + rename."""
+    """Write JSON atomically using temp file + rename.
+
+    The snapshot is streamed into the temp file location by location with the
+    SNAPSHOT_SERIALIZER backend, compact (floats rounded to SNAPSHOT_FLOAT_DIGITS, if set).
+    """
+    start = time.perf_counter()
     path.parent.mkdir(parents=True, exist_ok=True)
 
     # Write to temp file first
@@ -36,10 +70,12 @@ def write_json_atomic(data: dict, path: Path) -> None:
         suffix=".json.tmp", prefix="locations_", dir=path.parent
     )
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        with os.fdopen(fd, "wb") as f:
+            size = stream_snapshot(data, f, get_serializer(SNAPSHOT_SERIALIZER), SNAPSHOT_FLOAT_DIGITS)
+        SNAPSHOT_BYTES.set(size)
         # Atomic rename
         os.replace(tmp_path, path)
+        SNAPSHOT_WRITE_SECONDS.observe(time.perf_counter() - start)
     except Exception:
         # Clean up temp file on error
         try:
@@ -49,19 +85,144 @@ def write_json_atomic(data: dict, path: Path) -> None:
         raise
 
 
-def nws_fetch_loop(stop_event: threading.Event) -> None:
-    """Background thread to fetch NWS data periodically."""
+def nws_fetch_loop(stop_event: threading.Event, profile_path: Optional[str] = None) -> None:
+    """Background thread to fetch NWS data periodically.
+
+    Between full cycles, locations that failed are retried on their own with
+    exponential backoff (NWS_RETRY_INITIAL_SECONDS doubling up to NWS_RETRY_MAX_SECONDS);
+    meanwhile they keep serving their last good data flagged as stale.
+
+    If `profile_path` is set, the first cycle runs under cProfile and its stats are
+    written there.
+
+    With NWS_PROCESS_WORKERS > 0, parsing and assembly run in a process pool while
+    this thread keeps downloading.
+
+    Each cycle's requests are bounded by NWS_CYCLE_BUDGET_SECONDS (retries by the time
+    left until the next cycle), and with NWS_HEDGE_QUANTILE set, slow requests are
+    hedged at that percentile of the latencies seen so far.
+
+    With ENABLE_DEMAND_REFRESH, each location is refreshed on its own schedule:
+    every NWS_ACTIVE_INTERVAL_SECONDS while clients are viewing it (see demand.py),
+    every NWS_IDLE_INTERVAL_SECONDS otherwise, and as soon as an idle location is
+    viewed again if its data is older than the active interval. Without it, every
+    location is refreshed each NWS_INTERVAL_SECONDS.
+    """
+    pool = ProcessPoolExecutor(NWS_PROCESS_WORKERS) if NWS_PROCESS_WORKERS > 0 else None
+    resolver = get_resolver(GRID_RESOLVER_FILE) if ENABLE_GRID_RESOLVER else None
+    latency = LatencyTracker(NWS_HEDGE_QUANTILE) if NWS_HEDGE_QUANTILE else None
+    demand = get_demand() if ENABLE_DEMAND_REFRESH else None
+    archive = ForecastArchive(HISTORY_DB) if ENABLE_HISTORY else None
+    snapshots = get_store(LOCATIONS_FILE)
+    # Seed last-good data from the snapshot left by a previous run, if any.
+    data = snapshots.get()
+    # When each location was last refreshed (monotonic); none yet, so the first pass fetches all.
+    refreshed: Dict[str, float] = {}
+
+    def publish(snapshot: dict) -> None:
+        with span("write_json"):
+            write_json_atomic(snapshot, LOCATIONS_FILE)
+        snapshots.publish(snapshot)
+        if archive is not None:
+            try:
+                added = archive.append_snapshot(snapshot)
+                logger.info("[NWS] Archived %d new series", added)
+            except Exception as e:
+                logger.error("[NWS] Archive error: %s", e)
+
+    def interval(location: dict) -> float:
+        if demand is None:
+            return NWS_INTERVAL_SECONDS
+        return NWS_ACTIVE_INTERVAL_SECONDS if demand.is_active(location["name"]) else NWS_IDLE_INTERVAL_SECONDS
+
+    def due_at(location: dict) -> float:
+        return refreshed.get(location["name"], -math.inf) + interval(location)
+
+    def wait_until(deadline: float) -> bool:
+        """Sleep until `deadline`; returns early (True) when stopped or an idle location is viewed."""
+        while not stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if demand is None:
+                stop_event.wait(remaining)
+            elif demand.wake.wait(min(remaining, 1.0)):
+                return True
+        return True
+
     while not stop_event.is_set():
-        try:
-            logger.info("[NWS] Fetching data for %d locations...", len(LOCATIONS))
-            data = fetch_all_locations(LOCATIONS)
-            write_json_atomic(data, LOCATIONS_FILE)
-            logger.info("[NWS] Updated locations.json at %s", data["fetchedAt"])
-        except Exception as e:
-            logger.error("[NWS] Fetch error: %s", e)
+        if demand is not None:
+            demand.wake.clear()
+        now = time.monotonic()
+        due = [location for location in LOCATIONS if due_at(location) <= now]
+        if due:
+            try:
+                with trace("nws", profile_path):
+                    if data is None or len(due) == len(LOCATIONS):
+                        logger.info("[NWS] Fetching data for %d locations...", len(LOCATIONS))
+                        data = fetch_all_locations(
+                            LOCATIONS,
+                            previous=data,
+                            pool=pool,
+                            resolver=resolver,
+                            hourly_from_grid=NWS_HOURLY_FROM_GRID,
+                            budget=NWS_CYCLE_BUDGET_SECONDS,
+                            location_budget=NWS_LOCATION_BUDGET_SECONDS,
+                            latency=latency,
+                        )
+                    else:
+                        logger.info(
+                            "[NWS] Refreshing %d of %d locations: %s",
+                            len(due), len(LOCATIONS), ", ".join(location["name"] for location in due),
+                        )
+                        data = refresh_locations(
+                            data,
+                            due,
+                            resolver=resolver,
+                            hourly_from_grid=NWS_HOURLY_FROM_GRID,
+                            budget=NWS_CYCLE_BUDGET_SECONDS,
+                            location_budget=NWS_LOCATION_BUDGET_SECONDS,
+                            latency=latency,
+                        )
+                    publish(data)
+                logger.info("[NWS] Updated locations.json at %s", data["fetchedAt"])
+            except Exception as e:
+                logger.error("[NWS] Fetch error: %s", e)
+            for location in due:
+                refreshed[location["name"]] = now
+            profile_path = None
+        next_cycle = min(due_at(location) for location in LOCATIONS)
 
-        # Wait for next interval or until stopped
-        stop_event.wait(NWS_INTERVAL_SECONDS)
+        # Retry failed locations only, until they recover or the next refresh is due. Taken
+        # from every location, not just this pass's, so a wake doesn't drop pending retries.
+        backoff = NWS_RETRY_INITIAL_SECONDS
+        failed = failed_locations(data, LOCATIONS) if data else []
+        while failed:
+            delay = min(backoff, next_cycle - time.monotonic())
+            if delay <= 0 or wait_until(time.monotonic() + delay):
+                break
+            try:
+                logger.info("[NWS] Retrying %d failed locations...", len(failed))
+                data = retry_locations(
+                    data,
+                    failed,
+                    resolver=resolver,
+                    hourly_from_grid=NWS_HOURLY_FROM_GRID,
+                    budget=next_cycle - time.monotonic(),
+                    location_budget=NWS_LOCATION_BUDGET_SECONDS,
+                    latency=latency,
+                )
+                publish(data)
+                failed = failed_locations(data, failed)
+            except Exception as e:
+                logger.error("[NWS] Retry error: %s", e)
+            backoff = min(backoff * 2, NWS_RETRY_MAX_SECONDS)
+
+        # Wait for the next due refresh, a newly viewed idle location, or until stopped
+        wait_until(next_cycle)
+
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
 
 
 def hrrr_fetch_loop(stop_event: threading.Event) -> None:
@@ -71,35 +232,62 @@ def hrrr_fetch_loop(stop_event: threading.Event) -> None:
         return
 
     try:
-        from .hrrr_nbm_dl import sync_hrrr_nbm_subsets
+        from .hrrr_nbm_dl import CycleDiscovery, sync_hrrr_nbm_subsets
     except ImportError as e:
         logger.error("[HRRR] Could not import hrrr_nbm_dl: %s", e)
         return
 
+    discovery = CycleDiscovery()
+    last_result = None
+
     while not stop_event.is_set():
+        interval = HRRR_INTERVAL_SECONDS
         try:
             logger.info("[HRRR] Syncing HRRR/NBM subsets...")
-            result = sync_hrrr_nbm_subsets(
-                locations=LOCATIONS,
-                cache_dir=HRRR_CACHE_DIR,
-            )
-            logger.info(
-                "[HRRR] Synced: HRRR cycle %s, NBM cycle %s",
-                result["hrrr_cycle"],
-                result["nbm_cycle"],
-            )
+            with trace("hrrr"):
+                result = sync_hrrr_nbm_subsets(
+                    locations=LOCATIONS,
+                    cache_dir=HRRR_CACHE_DIR,
+                    session=discovery.session,
+                    discovery=discovery,
+                    previous=last_result,
+                )
+            last_result = result
+            if result["unchanged"]:
+                logger.info(
+                    "[HRRR] Cycles unchanged (HRRR %s, NBM %s); skipped downloads",
+                    result["hrrr_cycle"],
+                    result["nbm_cycle"],
+                )
+            elif result["complete"]:
+                logger.info(
+                    "[HRRR] Synced: HRRR cycle %s, NBM cycle %s",
+                    result["hrrr_cycle"],
+                    result["nbm_cycle"],
+                )
+            else:
+                # Cycle still filling in: publish what we have and come back sooner.
+                interval = HRRR_PARTIAL_INTERVAL_SECONDS
+                logger.info(
+                    "[HRRR] Partial: HRRR cycle %s missing %d fhrs, NBM cycle %s missing %d fhrs",
+                    result["hrrr_cycle"],
+                    len(result["missing"]["hrrr"]),
+                    result["nbm_cycle"],
+                    len(result["missing"]["nbm"]),
+                )
         except Exception as e:
             logger.error("[HRRR] Fetch error: %s", e)
+            interval = HRRR_PARTIAL_INTERVAL_SECONDS
 
         # Wait for next interval or until stopped
-        stop_event.wait(HRRR_INTERVAL_SECONDS)
+        stop_event.wait(interval)
 
 
-def start_background_tasks():
+def start_background_tasks(profile_path: Optional[str] = PROFILE_PATH):
     """Start NWS (and optionally HRRR) fetch threads. Returns (stop_event, threads)."""
     stop_event = threading.Event()
 
-    nws_thread = threading.Thread(target=nws_fetch_loop, args=(stop_event,), daemon=True)
+    nws_thread = threading.Thread(target=nws_fetch_loop, args=(stop_event, profile_path), daemon=True)
     hrrr_thread = threading.Thread(target=hrrr_fetch_loop, args=(stop_event,), daemon=True)
 
     nws_thread.start()
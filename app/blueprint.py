@@ -1,24 +1,98 @@
 """Flask Blueprint for the NWS weather dashboard."""
 
-from flask import Blueprint, send_from_directory
+import json
+import time
+
+import requests
+from flask import Blueprint, Response, jsonify, make_response, request, send_from_directory
 from pathlib import Path
+from werkzeug.exceptions import HTTPException
+
+from .delta import snapshot_delta
+from .demand import get_demand
+from .grids import get_resolver
+from .history import ForecastArchive
+from .metrics import CONTENT_TYPE, HTTP_LATENCY, HTTP_REQUESTS, REGISTRY
+from .ondemand import PointForecaster, parse_coordinate
+from .profiling import recent_traces
+from .proxy import NWSProxy
+from .series import build_pyramids, find_location, parse_step, parse_time, pick_level, window_series
+from .snapshots import get_store
+from .wire import CONTENT_TYPE as BINARY_CONTENT_TYPE, encode_snapshot
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent  # app/blueprint.py → app/ → project/
 
 DEFAULT_CONFIG = {
     "server_side": False,
     "data_dir": str(PROJECT_ROOT / "server_side" / "data"),
+    "metrics": True,
+    "debug_routes": False,
+    "history_db": None,
+    "point_cache_size": 256,
+    "point_cache_ttl": 1800,
+    "grid_resolver_file": None,
+    "hourly_from_grid": False,
+    "demand": False,
+    "nws_proxy": False,
+    "proxy_cache_size": 512,
+    "proxy_cache_bytes": 64 * 1024 * 1024,
+    "proxy_cache_dir": None,
 }
 
 
+def _observed(route, view):
+    """Record request count/latency for `view` under the given route label."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = make_response(view(*args, **kwargs))
+            status = response.status_code
+            return response
+        except HTTPException as e:
+            status = e.code
+            raise
+        finally:
+            HTTP_LATENCY.observe(time.perf_counter() - start, route=route)
+            HTTP_REQUESTS.inc(route=route, status=status)
+
+    wrapper.__name__ = view.__name__
+    return wrapper
+
+
 def create_blueprint(name="nws", config=None):
     """Create and return the NWS Flask Blueprint.
 
     Args:
         name: Blueprint name (used for url_for namespacing).
         config: Optional dict overriding DEFAULT_CONFIG keys.
-            - server_side (bool): If True, register /data/ route for pre-fetched data.
+            - server_side (bool): If True, register /data/ route for pre-fetched data
+              (plus the /data/locations.bin binary encoding,
+              /data/locations.delta?since=<fetchedAt> snapshot deltas and
+              /data/series/<location> downsampled chart levels).
             - data_dir (Path|str): Directory containing locations.json for server-side mode.
+            - metrics (bool): If True, expose Prometheus-style metrics at /metrics.
+            - debug_routes (bool): If True (server-side mode), expose recent fetch-cycle
+              timings at /debug/timings and demand at /debug/demand. These are
+              unauthenticated, so they are off unless enabled explicitly.
+            - history_db (Path|str|None): Forecast archive queried by /api/history
+              (server-side mode); None (the default) disables the route and never
+              opens the archive.
+            - point_cache_size (int), point_cache_ttl (seconds): Gridpoint result cache for
+              on-demand /api/point lookups (server-side mode).
+            - grid_resolver_file (Path|str|None): Learned NWS grid cache that lets
+              /api/point resolve most coordinates without a /points request.
+            - hourly_from_grid (bool): Derive /api/point's hourly periods from the grid
+              data instead of requesting forecastHourly.
+            - demand (bool): If True (server-side mode), record which locations clients
+              view (snapshot polls' viewing=<name>, POST /api/viewing?location=<name>
+              and the per-location routes) so the fetcher can prioritize them.
+            - nws_proxy (bool): If True (client-only mode), forward /proxy/nws/<path> to
+              api.weather.gov through a shared Cache-Control-aware cache. Off unless
+              enabled, as `main.py web --client` does.
+            - proxy_cache_size (int), proxy_cache_bytes (int), proxy_cache_dir (Path|str|None):
+              In-memory entry and total body byte bounds for that cache and an optional
+              directory to spill responses to.
 
     Returns:
         A Flask Blueprint that serves the NWS dashboard.
@@ -42,9 +116,202 @@ def create_blueprint(name="nws", config=None):
                 return send_from_directory(server_side_dir, filename)
             return send_from_directory(PROJECT_ROOT, filename)
 
-        @bp.route("/data/<path:filename>")
         def data_files(filename):
+            if filename == "locations.json":
+                note_viewing(request.args.get("viewing"))
             return send_from_directory(data_dir, filename)
+
+        bp.add_url_rule("/data/<path:filename>", view_func=_observed("/data/", data_files))
+
+        snapshots = get_store(data_dir / "locations.json")
+        snapshots.add_derivation("pyramids", build_pyramids)
+        demand = get_demand() if cfg["demand"] else None
+
+        def note_viewing(name):
+            # Only names in the snapshot count, so arbitrary strings can't grow the tracker.
+            snapshot = snapshots.get() if demand is not None and name else None
+            loc = find_location(snapshot, name) if snapshot else None
+            if loc is not None:
+                demand.mark(loc["name"])
+
+        def viewing():
+            note_viewing(request.args.get("location"))
+            return "", 204
+
+        bp.add_url_rule("/api/viewing", view_func=_observed("/api/viewing", viewing), methods=["POST"])
+
+        def locations_delta():
+            note_viewing(request.args.get("viewing"))
+            since = request.args.get("since")
+
+            def build(snapshot):
+                if since == snapshot["fetchedAt"]:
+                    body = {"type": "unchanged", "fetchedAt": since}
+                else:
+                    older = snapshots.recent(since) if since else None
+                    # Too old (or unknown) to diff against: send the whole snapshot.
+                    body = snapshot_delta(older, snapshot) if older else {"type": "full", **snapshot}
+                return json.dumps(body, separators=(",", ":"))
+
+            body = snapshots.cached(("delta", since), build)
+            if body is None:
+                return jsonify({"error": "no data fetched yet"}), 503
+            return Response(body, mimetype="application/json")
+
+        def locations_binary():
+            note_viewing(request.args.get("viewing"))
+            body = snapshots.cached(("binary",), encode_snapshot)
+            if body is None:
+                return jsonify({"error": "no data fetched yet"}), 503
+            return Response(body, content_type=BINARY_CONTENT_TYPE)
+
+        bp.add_url_rule(
+            "/data/locations.bin",
+            view_func=_observed("/data/locations.bin", locations_binary),
+        )
+
+        bp.add_url_rule(
+            "/data/locations.delta",
+            view_func=_observed("/data/locations.delta", locations_delta),
+        )
+
+        def series_levels(location):
+            try:
+                level = request.args.get("level")
+                width = request.args.get("width")
+                level = int(level) if level is not None else None
+                width = int(width) if width is not None else None
+            except ValueError:
+                return jsonify({"error": "level and width must be integers"}), 400
+
+            def build(snapshot):
+                # Looked up here so a pyramid is only ever memoised with its own snapshot;
+                # by name or index, like /api/forecast.
+                loc = find_location(snapshot, location)
+                pyramid = (snapshots.derived("pyramids") or {}).get(loc["name"].lower()) if loc else None
+                if pyramid is None:
+                    return None
+                chosen = level
+                if chosen is None:
+                    chosen = pick_level(pyramid, width) if width else 0
+                if not 0 <= chosen < len(pyramid["levels"]):
+                    return 400, f"level must be 0-{len(pyramid['levels']) - 1}"
+                return 200, json.dumps({
+                    "fetchedAt": snapshot["fetchedAt"],
+                    "name": pyramid["name"],
+                    "length": pyramid["length"],
+                    "levels": [lvl["points"] for lvl in pyramid["levels"]],
+                    **pyramid["levels"][chosen],
+                }, separators=(",", ":"))
+
+            if snapshots.get() is None:
+                return jsonify({"error": "no data fetched yet"}), 503
+            note_viewing(location)
+            result = snapshots.cached(("series", location.lower(), level, width), build)
+            if result is None:
+                return jsonify({"error": f"unknown location {location!r}"}), 404
+            status, body = result
+            if status != 200:
+                return jsonify({"error": body}), status
+            return Response(body, mimetype="application/json")
+
+        bp.add_url_rule(
+            "/data/series/<path:location>",
+            view_func=_observed("/data/series/", series_levels),
+        )
+
+        def forecast_window(location):
+            metrics = request.args.get("metrics")
+            key = (
+                location.lower(),
+                tuple(sorted(metrics.split(","))) if metrics else None,
+                request.args.get("start"),
+                request.args.get("end"),
+                request.args.get("step"),
+            )
+            try:
+                start = parse_time(key[2]) if key[2] else None
+                end = parse_time(key[3]) if key[3] else None
+                step = parse_step(key[4])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+            def build(snapshot):
+                loc = find_location(snapshot, location)
+                if loc is None:
+                    return None
+                body = window_series(loc, key[1], start, end, step)
+                return json.dumps({"fetchedAt": snapshot["fetchedAt"], **body}, separators=(",", ":"))
+
+            if snapshots.get() is None:
+                return jsonify({"error": "no data fetched yet"}), 503
+            note_viewing(location)
+            body = snapshots.cached(("forecast", key), build)
+            if body is None:
+                return jsonify({"error": f"unknown location {location!r}"}), 404
+            return Response(body, mimetype="application/json")
+
+        bp.add_url_rule(
+            "/api/forecast/<path:location>",
+            view_func=_observed("/api/forecast", forecast_window),
+        )
+
+        resolver = get_resolver(cfg["grid_resolver_file"]) if cfg["grid_resolver_file"] else None
+        points = PointForecaster(
+            cfg["point_cache_size"], cfg["point_cache_ttl"], resolver, cfg["hourly_from_grid"]
+        )
+
+        def point_forecast():
+            try:
+                lat, lon = parse_coordinate(request.args.get("lat"), request.args.get("lon"))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            try:
+                return jsonify(points.forecast(lat, lon))
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 502
+                # /points answers 404 for coordinates outside NWS coverage.
+                return jsonify({"error": str(e)}), 404 if status == 404 else 502
+            except requests.RequestException as e:
+                return jsonify({"error": str(e)}), 502
+
+        bp.add_url_rule("/api/point", view_func=_observed("/api/point", point_forecast))
+
+        if cfg["history_db"]:
+            archive = ForecastArchive(cfg["history_db"])
+
+            def history():
+                location = request.args.get("location")
+                metric = request.args.get("metric")
+                if not location or not metric:
+                    return jsonify({"error": "location and metric are required"}), 400
+
+                try:
+                    valid = request.args.get("valid")
+                    if valid:
+                        return jsonify({
+                            "location": location,
+                            "metric": metric,
+                            "valid": valid,
+                            "forecasts": archive.forecasts_for_valid_time(location, metric, valid),
+                        })
+                    change = archive.run_to_run_change(location, metric, request.args.get("issue"))
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                if change is None:
+                    return jsonify({"error": "no history for location/metric"}), 404
+                return jsonify({"location": location, "metric": metric, **change})
+
+            bp.add_url_rule("/api/history", view_func=_observed("/api/history", history))
+
+        if cfg["debug_routes"]:
+            @bp.route("/debug/timings")
+            def debug_timings():
+                return jsonify(recent_traces(request.args.get("kind")))
+
+            @bp.route("/debug/demand")
+            def debug_demand():
+                return jsonify(demand.idle_seconds() if demand is not None else {})
     else:
         @bp.route("/")
         def index():
@@ -54,4 +321,23 @@ def create_blueprint(name="nws", config=None):
         def static_files(filename):
             return send_from_directory(PROJECT_ROOT, filename)
 
+        if cfg["nws_proxy"]:
+            proxy = NWSProxy(cfg["proxy_cache_size"], cfg["proxy_cache_dir"], max_bytes=cfg["proxy_cache_bytes"])
+
+            def nws_proxy(path):
+                try:
+                    entry, served = proxy.get(path, request.query_string.decode("utf-8"))
+                except requests.RequestException as e:
+                    return jsonify({"error": str(e)}), 502
+                response = Response(entry.body, status=entry.status, headers=entry.headers)
+                response.headers["X-Cache"] = served.upper()
+                return response
+
+            bp.add_url_rule("/proxy/nws/<path:path>", view_func=_observed("/proxy/nws/", nws_proxy))
+
+    if cfg["metrics"]:
+        @bp.route("/metrics")
+        def metrics():
+            return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
     return bp
@@ -1,5 +1,6 @@
 """Configuration for the NWS weather dashboard server."""
 
+import os
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent  # app/config.py → app/ → project/
@@ -16,9 +17,65 @@ LOCATIONS = [
 # NWS data refresh interval (30 minutes)
 NWS_INTERVAL_SECONDS = 1800
 
+# Demand-driven refresh: locations viewed within the window are refreshed at the active
+# (fastest allowed) interval, the rest at the idle interval and on their first view.
+# Off by default: every location is then refreshed each NWS_INTERVAL_SECONDS
+ENABLE_DEMAND_REFRESH = False
+NWS_DEMAND_WINDOW_SECONDS = 1800
+NWS_ACTIVE_INTERVAL_SECONDS = 900
+NWS_IDLE_INTERVAL_SECONDS = 6 * 3600
+
+# Backoff for retrying only the locations that failed, between full NWS cycles
+NWS_RETRY_INITIAL_SECONDS = 30
+NWS_RETRY_MAX_SECONDS = 480
+
+# Time budget for one NWS cycle's requests, and for each location's within it; locations
+# that miss it keep their previous data (flagged stale) and are retried like failures
+NWS_CYCLE_BUDGET_SECONDS = 300
+NWS_LOCATION_BUDGET_SECONDS = 90
+
+# Send a duplicate request when one runs past this percentile of recent latencies for its
+# endpoint, e.g. 0.95 (None = no hedging, the default: each hedge is an extra upstream request)
+NWS_HEDGE_QUANTILE = None
+
+# Threads for budgeted/hedged upstream requests; abandoned requests hold one until their own
+# timeout, so a hung endpoint can fill the pool (a warning is logged when it does)
+NWS_REQUEST_WORKERS = 16
+
+# Worker processes for the NWS processing stage (0 = process on the fetcher thread)
+NWS_PROCESS_WORKERS = 0
+
+# locations.json encoding: serializer backend ("auto" = orjson if installed, else stdlib json)
+# and decimal places kept for floats (None = full precision; rounding is several times slower
+# to write for a 1-2% smaller file)
+SNAPSHOT_SERIALIZER = "auto"
+SNAPSHOT_FLOAT_DIGITS = None
+
+# Derive hourly periods (time axis, shortForecast, wind text) from the gridpoint data
+# instead of requesting forecastHourly: one fewer upstream request per location
+NWS_HOURLY_FROM_GRID = False
+
+# On-demand /api/point lookups: cached results per NWS gridpoint, refreshed like the main loop
+POINT_CACHE_SIZE = 256
+POINT_CACHE_TTL_SECONDS = NWS_INTERVAL_SECONDS
+
+# Resolve lat/lon to NWS gridpoints locally (learned from earlier /points and forecast responses).
+# Off by default: a wrong prediction costs a second round of requests once it is detected
+ENABLE_GRID_RESOLVER = False
+GRID_RESOLVER_FILE = PROJECT_ROOT / "wx_cache" / "nws_grids.json"
+
+# Client-only mode's /proxy/nws cache: in-memory entries, their total body bytes, and an
+# optional disk spill directory
+PROXY_CACHE_SIZE = 512
+PROXY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PROXY_CACHE_DIR = None
+
 # HRRR/NBM data refresh interval (1 hour)
 HRRR_INTERVAL_SECONDS = 3600
 
+# Faster HRRR/NBM re-poll while the latest cycle is still being published (5 minutes)
+HRRR_PARTIAL_INTERVAL_SECONDS = 300
+
 # Enable HRRR/NBM downloads (disabled by default)
 ENABLE_HRRR = False
 
@@ -27,3 +84,14 @@ SERVER_PORT = 5173
 
 # Cache directory for HRRR/NBM data
 HRRR_CACHE_DIR = str(PROJECT_ROOT / "wx_cache")
+
+# Append each NWS cycle to the forecast history archive (served at /api/history). Off by
+# default: the archive has no retention and grows with every cycle
+ENABLE_HISTORY = False
+HISTORY_DB = str(PROJECT_ROOT / "history" / "forecasts.sqlite3")
+
+# Serve /debug/timings and /debug/demand from main.py web (unauthenticated; keep off in production)
+ENABLE_DEBUG_ROUTES = False
+
+# Write a cProfile dump of the first NWS fetch cycle to this path (also: main.py web --profile)
+PROFILE_PATH = os.environ.get("NWS_PROFILE_PATH") or None
@@ -0,0 +1,188 @@
+"""Deadline budgets and hedged requests for the NWS fetch cycle.
+
+A cycle gets a total time budget and each location a sub-budget within it
+(`Deadline.child`); every upstream request's timeout is capped by the time left,
+and a request still running when its deadline passes is abandoned. So one
+degraded endpoint costs at most the budget instead of 30 s per request.
+
+With a `LatencyTracker`, a request that takes longer than a percentile of recent
+latencies for its endpoint gets a duplicate ("hedged") request, and whichever
+succeeds first is used. Tail latency then costs about one typical request more
+instead of the full timeout.
+
+Requests run on a shared pool of NWS_REQUEST_WORKERS threads, each with its own
+`requests.Session` (`thread_session`; sessions aren't thread-safe). Abandoned
+requests keep their worker until their own timeout ends them, so when the pool
+is saturated a warning is logged, hedging pauses, and queued requests whose
+deadline passes before they start are dropped without being sent.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+import requests
+
+from .config import NWS_REQUEST_WORKERS
+from .metrics import UPSTREAM_HEDGES
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Requests run here when they may need to be abandoned or hedged.
+_pool = ThreadPoolExecutor(max_workers=NWS_REQUEST_WORKERS, thread_name_prefix="nws-request")
+_local = threading.local()
+# Calls submitted to _pool and not yet finished, including abandoned ones.
+_outstanding = 0
+_outstanding_lock = threading.Lock()
+
+
+def thread_session() -> requests.Session:
+    """This thread's own requests.Session."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _saturated() -> bool:
+    with _outstanding_lock:
+        return _outstanding >= NWS_REQUEST_WORKERS
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The budget ran out before (or while) making a request."""
+
+
+class LatencyTracker:
+    """Recent successful request latencies per endpoint, for picking hedge delays."""
+
+    def __init__(self, quantile: float = 0.95, window: int = 200, min_samples: int = 20):
+        self.quantile = quantile
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def threshold(self, endpoint: str) -> Optional[float]:
+        """The tracked latency percentile for `endpoint`, or None until enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(self.quantile * len(samples)) - 1)]
+
+
+class Deadline:
+    """A point in time work must finish by (`seconds` from now; None = no limit)."""
+
+    def __init__(self, seconds: Optional[float] = None, latency: Optional[LatencyTracker] = None):
+        self.at = None if seconds is None else time.monotonic() + seconds
+        self.latency = latency
+
+    def child(self, seconds: Optional[float]) -> "Deadline":
+        """Sub-budget of at most `seconds`, ending no later than this deadline."""
+        child = Deadline(seconds, self.latency)
+        if self.at is not None and (child.at is None or self.at < child.at):
+            child.at = self.at
+        return child
+
+    def remaining(self) -> float:
+        return math.inf if self.at is None else self.at - time.monotonic()
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for a request started now: `cap`, or less if the deadline is nearer."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("deadline exceeded")
+        return min(cap, remaining)
+
+    def call(self, endpoint: str, fn: Callable[[float], T], cap: float) -> T:
+        """
+        Run fn(timeout) within this deadline, hedging it once it runs past the
+        tracked latency percentile for `endpoint`.
+        """
+        delay = self.latency.threshold(endpoint) if self.latency is not None else None
+        if self.at is None and delay is None:
+            return fn(cap)
+
+        self.timeout(cap)  # fail fast if the budget is already spent
+        futures = [self._submit(endpoint, fn, cap)]
+        if delay is not None:
+            done, _ = wait(futures, timeout=min(delay, self.remaining()))
+            # A duplicate would only queue behind the requests already holding the pool.
+            if not done and self.remaining() > 0 and not _saturated():
+                UPSTREAM_HEDGES.inc(endpoint=endpoint)
+                futures.append(self._submit(endpoint, fn, cap))
+
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        while pending:
+            timeout = None if self.at is None else max(0.0, self.remaining())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Abandon the stragglers; their own timeouts end them (or, if still
+                # queued, they never start).
+                for future in pending:
+                    future.cancel()
+                raise DeadlineExceeded(f"deadline exceeded waiting for {endpoint}")
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        if isinstance(error, requests.Timeout) and self.remaining() <= 0:
+            # Its timeout was cut short by the deadline.
+            raise DeadlineExceeded(f"deadline exceeded waiting for {endpoint}") from error
+        raise error
+
+    def _submit(self, endpoint: str, fn: Callable[[float], T], cap: float) -> "Future[T]":
+        """Run fn on the request pool, with its timeout taken when it starts rather than when queued."""
+        global _outstanding
+        with _outstanding_lock:
+            _outstanding += 1
+            outstanding = _outstanding
+        if outstanding == NWS_REQUEST_WORKERS + 1:
+            logger.warning(
+                "[NWS] Request pool saturated (%d workers busy, some possibly with abandoned "
+                "requests); %s requests are queueing",
+                NWS_REQUEST_WORKERS,
+                endpoint,
+            )
+
+        def run() -> T:
+            try:
+                return fn(self.timeout(cap))
+            finally:
+                _release()
+
+        future = _pool.submit(run)
+        future.add_done_callback(_release_cancelled)
+        return future
+
+
+def _release() -> None:
+    global _outstanding
+    with _outstanding_lock:
+        _outstanding -= 1
+
+
+def _release_cancelled(future: Future) -> None:
+    # Cancelled while queued, so run() never released it.
+    if future.cancelled():
+        _release()
@@ -0,0 +1,97 @@
+"""Compact differences between consecutive locations.json snapshots.
+
+A refresh mostly slides each location's hourly window forward and touches a few
+values, so a delta per location carries only:
+
+- "drop": hours removed from the front, "append": new hours at the end
+- "changes": [[index, {field: value, "metrics": {key: value}}], ...] for overlapping
+  hours (indices are into the new hourly list)
+- "daily": {"length": n, "cards": {index: card}} for changed daily forecast cards
+- "set" / "unset": other top-level fields (metrics, extents, updated, stale, ...)
+
+Locations whose hours no longer line up (or that are new) are sent in full. The
+client applies deltas to the snapshot it already holds (see applyDelta in
+server_side/app.js).
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+_HOURLY_FIELDS = ("shortForecast", "windDirection", "windSpeedText")
+
+
+def _hour_changes(old: Dict, new: Dict) -> Optional[Dict]:
+    change: Dict = {}
+    for field in _HOURLY_FIELDS:
+        if old.get(field) != new.get(field):
+            change[field] = new.get(field)
+    old_metrics, new_metrics = old.get("metrics", {}), new.get("metrics", {})
+    metrics = {key: value for key, value in new_metrics.items() if old_metrics.get(key) != value}
+    metrics.update({key: None for key in old_metrics.keys() - new_metrics.keys()})
+    if metrics:
+        change["metrics"] = metrics
+    return change or None
+
+
+def location_delta(old: Dict, new: Dict) -> Dict:
+    """Delta turning location entry `old` into `new` ({"name", "full"} if they don't align)."""
+    old_hourly, new_hourly = old.get("hourly", []), new.get("hourly", [])
+    old_times = [entry["time"] for entry in old_hourly]
+    if new_hourly and old_times:
+        try:
+            drop = old_times.index(new_hourly[0]["time"])
+        except ValueError:
+            drop = len(old_times) if new_hourly[0]["time"] > old_times[-1] else -1
+    else:
+        drop = len(old_times)
+    overlap = len(old_times) - drop
+    if drop < 0 or overlap > len(new_hourly) or any(
+        old_hourly[drop + i]["time"] != new_hourly[i]["time"] for i in range(overlap)
+    ):
+        return {"name": new["name"], "full": new}
+
+    changes: List = []
+    for i in range(overlap):
+        change = _hour_changes(old_hourly[drop + i], new_hourly[i])
+        if change:
+            changes.append([i, change])
+
+    delta: Dict = {"name": new["name"]}
+    if drop:
+        delta["drop"] = drop
+    if len(new_hourly) > overlap:
+        delta["append"] = new_hourly[overlap:]
+    if changes:
+        delta["changes"] = changes
+
+    old_daily, new_daily = old.get("dailyForecast", []), new.get("dailyForecast", [])
+    cards = {
+        str(i): card for i, card in enumerate(new_daily) if i >= len(old_daily) or old_daily[i] != card
+    }
+    if cards or len(old_daily) != len(new_daily):
+        delta["daily"] = {"length": len(new_daily), "cards": cards}
+
+    skip = {"name", "hourly", "dailyForecast"}
+    updated = {key: value for key, value in new.items() if key not in skip and old.get(key) != value}
+    if updated:
+        delta["set"] = updated
+    removed = sorted(old.keys() - new.keys() - skip)
+    if removed:
+        delta["unset"] = removed
+    return delta
+
+
+def snapshot_delta(old: Dict, new: Dict) -> Dict:
+    """Delta from snapshot `old` to `new`; locations are listed in `new`'s order."""
+    previous = {loc["name"]: loc for loc in old.get("locations", [])}
+    locations = []
+    for loc in new.get("locations", []):
+        prior = previous.get(loc["name"])
+        locations.append(location_delta(prior, loc) if prior is not None else {"name": loc["name"], "full": loc})
+    return {
+        "type": "delta",
+        "since": old["fetchedAt"],
+        "fetchedAt": new["fetchedAt"],
+        "locations": locations,
+    }
@@ -0,0 +1,62 @@
+"""Which locations clients are looking at, for demand-driven NWS refreshes.
+
+The blueprint marks a location whenever a client views it: the `viewing=`
+parameter dashboards send with each snapshot poll, the beacon sent when one
+selects a location, and the per-location /data/series and /api/forecast routes.
+The NWS fetch loop refreshes locations seen within the last window at the
+active interval and backs the rest off to the idle interval; the first view of
+an idle location sets `wake` so it is refreshed right away.
+
+Demand is tracked per process, so it only reaches the fetcher when the web
+server and fetcher share a process (as with `main.py web`).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import NWS_DEMAND_WINDOW_SECONDS
+
+_tracker: Optional["DemandTracker"] = None
+_tracker_lock = threading.Lock()
+
+
+class DemandTracker:
+    """Last time each location was viewed, and an event set when an idle one is viewed."""
+
+    def __init__(self, window: float = NWS_DEMAND_WINDOW_SECONDS):
+        self.window = window
+        self.wake = threading.Event()
+        self._lock = threading.Lock()
+        self._seen: Dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            last = self._seen.get(name)
+            self._seen[name] = now
+        if last is None or now - last > self.window:
+            self.wake.set()
+
+    def is_active(self, name: str) -> bool:
+        """True if `name` was viewed within the window."""
+        with self._lock:
+            last = self._seen.get(name)
+        return last is not None and time.monotonic() - last <= self.window
+
+    def idle_seconds(self) -> Dict[str, float]:
+        """Seconds since each viewed location was last viewed."""
+        now = time.monotonic()
+        with self._lock:
+            return {name: round(now - last, 1) for name, last in self._seen.items()}
+
+
+def get_demand() -> DemandTracker:
+    """Shared tracker (the blueprint marks, the fetch loop reads)."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = DemandTracker()
+        return _tracker
@@ -0,0 +1,367 @@
+"""Offline lat/lon -> NWS gridpoint resolution, learned from earlier API responses.
+
+Every CONUS forecast office grid is a window onto the NDFD 2.5 km Lambert conformal
+grid (standard parallel 25N, central meridian 95W), so within one office
+gridX/gridY are (projected x, y) / spacing minus a per-office origin. The resolver
+learns each office's origin from gridpoint cell polygons seen in forecast
+responses, and which office covers an area from the /points responses and cells
+it has seen, bucketed in a coarse lat/lon index.
+
+A coordinate is resolved locally only when the answer is unambiguous: it was
+looked up before, or every known sample within NEARBY_KM belongs to one office
+whose learned cells agree with the projection, and the coordinate isn't on a cell
+edge. Anything else returns None so the caller asks /points. Each forecast
+fetched afterwards checks that the coordinate really lies in the returned cell;
+a miss disables local resolution for that office, and a locally resolved point
+that misses is re-resolved through /points and fetched again.
+
+Offline answers carry the time zone /points reported for the coordinate, or the
+only one seen nearby (hourly periods derived from grid data are bucketed in it);
+without one the API is asked.
+
+Alaska, Hawaii and the territories use other projections; their cells don't fit
+the grid and those offices always go to the API.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NWS_API = "https://api.weather.gov"
+
+# NDFD CONUS grid: spherical earth, tangent Lambert conformal at 25N, 95W; 2539.703 m cells.
+EARTH_RADIUS_KM = 6371.2
+GRID_SPACING_KM = 2.539703
+_PHI1 = math.radians(25.0)
+_LON0 = -95.0
+_N = math.sin(_PHI1)
+_F = math.cos(_PHI1) * math.tan(math.pi / 4 + _PHI1 / 2) ** _N / _N
+_RHO0 = EARTH_RADIUS_KM * _F / math.tan(math.pi / 4 + _PHI1 / 2) ** _N
+
+# Samples must all come from one office within this radius for a local answer.
+NEARBY_KM = 40.0
+# Predictions this close (in cells) to a cell edge are left to the API.
+EDGE_MARGIN = 0.1
+# A cell whose learned origin disagrees by more than this (cells) marks the office unusable.
+ORIGIN_TOLERANCE = 0.1
+INDEX_BUCKET_DEG = 1.0
+
+
+def project(lat: float, lon: float) -> Tuple[float, float]:
+    """NDFD Lambert conformal x, y in km."""
+    rho = EARTH_RADIUS_KM * _F / math.tan(math.pi / 4 + math.radians(lat) / 2) ** _N
+    theta = _N * math.radians(lon - _LON0)
+    return rho * math.sin(theta), _RHO0 - rho * math.cos(theta)
+
+
+def _inside_cell(lat: float, lon: float, ring: List[List[float]]) -> bool:
+    """Whether the coordinate lies in a grid cell polygon, allowing for its 4-decimal rounding."""
+    corners = [project(c_lat, c_lon) for c_lon, c_lat in ring[:4]]
+    cx = sum(c[0] for c in corners) / 4
+    cy = sum(c[1] for c in corners) / 4
+    x, y = project(lat, lon)
+    half = GRID_SPACING_KM / 2 + 0.05
+    return abs(x - cx) <= half and abs(y - cy) <= half
+
+
+def gridpoint_urls(grid_id: str, grid_x: int, grid_y: int) -> Dict[str, str]:
+    base = f"{NWS_API}/gridpoints/{grid_id}/{grid_x},{grid_y}"
+    return {"forecast": f"{base}/forecast", "forecastHourly": f"{base}/forecast/hourly", "forecastGridData": base}
+
+
+class _Office:
+    def __init__(self):
+        self.origins: List[Tuple[float, float]] = []
+        self.usable = True
+
+    @property
+    def origin(self) -> Optional[Tuple[float, float]]:
+        if not self.origins:
+            return None
+        return (
+            sum(o[0] for o in self.origins) / len(self.origins),
+            sum(o[1] for o in self.origins) / len(self.origins),
+        )
+
+
+class GridResolver:
+    """Learned office grids plus a cache of exact coordinate lookups, persisted to `path`."""
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._points: Dict[str, Dict] = {}
+        self._cells: Dict[str, Dict] = {}
+        self._disabled: Dict[str, str] = {}
+        self._offices: Dict[str, _Office] = {}
+        self._index: Dict[Tuple[int, int], List[Tuple[float, float, str]]] = {}
+        # Same buckets, sampling the time zones /points reported (offline answers need one).
+        self._zones: Dict[Tuple[int, int], List[Tuple[float, float, str]]] = {}
+        self._dirty = False
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                self._disabled = saved.get("disabled", {})
+                for cell in saved.get("cells", []):
+                    self._add_cell(cell)
+                for point in saved.get("points", []):
+                    self._add_point(point)
+                self._dirty = False
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("[NWS] Ignoring unreadable grid cache %s: %s", self.path, e)
+
+    @staticmethod
+    def _coord_key(lat: float, lon: float) -> str:
+        return f"{round(lat, 4)},{round(lon, 4)}"
+
+    @staticmethod
+    def _sample(index: Dict, lat: float, lon: float, label: str) -> None:
+        bucket = (math.floor(lat / INDEX_BUCKET_DEG), math.floor(lon / INDEX_BUCKET_DEG))
+        index.setdefault(bucket, []).append((lat, lon, label))
+
+    def _index_sample(self, lat: float, lon: float, grid_id: str) -> None:
+        self._sample(self._index, lat, lon, grid_id)
+
+    def _add_point(self, point: Dict) -> None:
+        key = self._coord_key(point["lat"], point["lon"])
+        known = self._points.get(key)
+        if known and "timeZone" not in point and known.get("timeZone"):
+            # Forecast observations don't carry the zone; keep the one /points gave.
+            point = {**point, "timeZone": known["timeZone"]}
+        if known == point:
+            return
+        if known is None:
+            self._index_sample(point["lat"], point["lon"], point["gridId"])
+        if point.get("timeZone") and (known is None or known.get("timeZone") != point["timeZone"]):
+            self._sample(self._zones, point["lat"], point["lon"], point["timeZone"])
+        self._points[key] = point
+        self._dirty = True
+
+    def _add_cell(self, cell: Dict) -> None:
+        key = f"{cell['gridId']}/{cell['gridX']},{cell['gridY']}"
+        if key in self._cells:
+            return
+        self._cells[key] = cell
+        self._dirty = True
+        office = self._offices.setdefault(cell["gridId"], _Office())
+        corners = [project(lat, lon) for lon, lat in cell["polygon"][:4]]
+        cx = sum(c[0] for c in corners) / 4
+        cy = sum(c[1] for c in corners) / 4
+        lon_c = sum(p[0] for p in cell["polygon"][:4]) / 4
+        lat_c = sum(p[1] for p in cell["polygon"][:4]) / 4
+        self._index_sample(lat_c, lon_c, cell["gridId"])
+
+        # The cell must be a grid-aligned square of the NDFD spacing, else this isn't a CONUS grid.
+        for (x1, y1), (x2, y2) in zip(corners, corners[1:] + corners[:1]):
+            dx, dy = abs(x2 - x1), abs(y2 - y1)
+            if abs(max(dx, dy) - GRID_SPACING_KM) > 0.05 * GRID_SPACING_KM or min(dx, dy) > 0.05 * GRID_SPACING_KM:
+                office.usable = False
+                return
+        origin = (cx / GRID_SPACING_KM - cell["gridX"], cy / GRID_SPACING_KM - cell["gridY"])
+        current = office.origin
+        if current and max(abs(origin[0] - current[0]), abs(origin[1] - current[1])) > ORIGIN_TOLERANCE:
+            office.usable = False
+        office.origins.append(origin)
+
+    @staticmethod
+    def _only_label_near(index: Dict, lat: float, lon: float) -> Optional[str]:
+        """The label of every sample within NEARBY_KM, or None if there are none or several."""
+        x, y = project(lat, lon)
+        bi, bj = math.floor(lat / INDEX_BUCKET_DEG), math.floor(lon / INDEX_BUCKET_DEG)
+        found = set()
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for s_lat, s_lon, label in index.get((bi + di, bj + dj), []):
+                    sx, sy = project(s_lat, s_lon)
+                    if math.hypot(sx - x, sy - y) <= NEARBY_KM:
+                        found.add(label)
+        return found.pop() if len(found) == 1 else None
+
+    def _office_near(self, lat: float, lon: float) -> Optional[str]:
+        return self._only_label_near(self._index, lat, lon)
+
+    def predict(self, lat: float, lon: float) -> Optional[Tuple[str, int, int]]:
+        """(gridId, gridX, gridY) from the learned grids alone, or None when unsure."""
+        with self._lock:
+            grid_id = self._office_near(lat, lon)
+            office = self._offices.get(grid_id) if grid_id else None
+            if office is None or not office.usable or office.origin is None or grid_id in self._disabled:
+                return None
+            x, y = project(lat, lon)
+            gx = x / GRID_SPACING_KM - office.origin[0]
+            gy = y / GRID_SPACING_KM - office.origin[1]
+        for value in (gx, gy):
+            if abs(abs(value - round(value)) - 0.5) < EDGE_MARGIN:
+                return None
+        return grid_id, round(gx), round(gy)
+
+    def resolve(self, lat: float, lon: float) -> Optional[Dict]:
+        """
+        A /points-shaped response for the coordinate, or None if the API should be asked.
+        Its timeZone is the one /points gave for the coordinate, or the only one seen
+        nearby; without one the API is asked too, since hourly periods need it.
+        """
+        with self._lock:
+            known = self._points.get(self._coord_key(lat, lon))
+            if known and known["gridId"] in self._disabled:
+                known = None
+            if known:
+                zone = known.get("timeZone")
+            else:
+                zone = self._only_label_near(self._zones, lat, lon)
+        if not zone:
+            return None
+        grid = (known["gridId"], known["gridX"], known["gridY"]) if known else self.predict(lat, lon)
+        if grid is None:
+            return None
+        grid_id, grid_x, grid_y = grid
+        return {
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "gridId": grid_id,
+                "gridX": grid_x,
+                "gridY": grid_y,
+                "timeZone": zone,
+                **gridpoint_urls(grid_id, grid_x, grid_y),
+                "resolvedOffline": True,
+            },
+        }
+
+    def learn_point(self, lat: float, lon: float, point: Dict) -> None:
+        """Record a /points response, checking it against what would have been predicted."""
+        props = point.get("properties", {})
+        if not all(props.get(k) is not None for k in ("gridId", "gridX", "gridY")):
+            return
+        predicted = self.predict(lat, lon)
+        actual = (props["gridId"], props["gridX"], props["gridY"])
+        with self._lock:
+            if predicted is not None and predicted != actual:
+                self._disable(actual[0], f"predicted {predicted} for {lat},{lon}, API said {actual}")
+            learned = {"lat": lat, "lon": lon, "gridId": actual[0], "gridX": actual[1], "gridY": actual[2]}
+            if props.get("timeZone"):
+                learned["timeZone"] = props["timeZone"]
+            self._add_point(learned)
+        self._save()
+
+    def observe(self, lat: float, lon: float, gridpoint: Optional[Dict]) -> bool:
+        """
+        Learn a cell from a fetched forecast and confirm the coordinate lies inside it.
+        False if it doesn't: the gridpoint was wrong and its office is no longer predicted.
+        """
+        if not gridpoint or not gridpoint.get("cell"):
+            return True
+        ring = gridpoint["cell"]
+        with self._lock:
+            office = self._offices.get(gridpoint["gridId"])
+            checkable = office is None or office.usable
+            inside = not checkable or _inside_cell(lat, lon, ring)
+            if not inside:
+                self._disable(gridpoint["gridId"], f"{lat},{lon} outside cell {gridpoint['gridX']},{gridpoint['gridY']}")
+                self._points.pop(self._coord_key(lat, lon), None)
+            else:
+                self._add_point({
+                    "lat": lat, "lon": lon, "gridId": gridpoint["gridId"],
+                    "gridX": gridpoint["gridX"], "gridY": gridpoint["gridY"],
+                })
+            self._add_cell({
+                "gridId": gridpoint["gridId"], "gridX": gridpoint["gridX"],
+                "gridY": gridpoint["gridY"], "polygon": ring,
+            })
+        self._save()
+        return inside
+
+    def forget(self, lat: float, lon: float, point: Dict) -> None:
+        """Drop a local answer that turned out not to exist upstream (404) and stop predicting its office."""
+        props = point.get("properties", {})
+        with self._lock:
+            self._points.pop(self._coord_key(lat, lon), None)
+            self._dirty = True
+            self._disable(props.get("gridId"), f"{props.get('forecastGridData')} not found")
+        self._save()
+
+    def _disable(self, grid_id: str, reason: str) -> None:
+        # Caller holds the lock.
+        if grid_id not in self._disabled:
+            logger.warning("[NWS] Offline grid resolution disabled for %s: %s", grid_id, reason)
+            self._disabled[grid_id] = reason
+            self._dirty = True
+
+    def validate(self) -> Dict:
+        """
+        Re-predict every cached /points lookup; counts of agreements, mismatches and
+        unsure. Offices with a mismatch are no longer predicted.
+        """
+        with self._lock:
+            points = list(self._points.values())
+        result = {"checked": len(points), "agreed": 0, "unsure": 0, "mismatches": []}
+        for p in points:
+            predicted = self.predict(p["lat"], p["lon"])
+            if predicted is None:
+                result["unsure"] += 1
+            elif predicted == (p["gridId"], p["gridX"], p["gridY"]):
+                result["agreed"] += 1
+            else:
+                result["mismatches"].append({**p, "predicted": list(predicted)})
+        if result["mismatches"]:
+            with self._lock:
+                for m in result["mismatches"]:
+                    self._disable(m["gridId"], f"{m['lat']},{m['lon']} predicted as {m['predicted']}")
+            self._save()
+        return result
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            saved = {
+                "points": list(self._points.values()),
+                "cells": list(self._cells.values()),
+                "disabled": dict(self._disabled),
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(saved, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("[NWS] Could not save grid cache: %s", e)
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+_resolvers: Dict[Path, GridResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(path: str | Path) -> GridResolver:
+    """
+    Shared resolver for a cache file (the fetcher and /api/point learn into the same
+    one), validated against its cached /points lookups when first loaded.
+    """
+    resolved = Path(path).resolve()
+    with _resolvers_lock:
+        resolver = _resolvers.get(resolved)
+        if resolver is None:
+            resolver = _resolvers[resolved] = GridResolver(resolved)
+            check = resolver.validate()
+            logger.info(
+                "[NWS] Grid resolver: %d cached points, %d re-predicted, %d unsure, %d mismatched",
+                check["checked"], check["agreed"], check["unsure"], len(check["mismatches"]),
+            )
+        return resolver
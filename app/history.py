@@ -0,0 +1,199 @@
+"""Append-only archive of past forecast cycles for skill and run-to-run queries.
+
+Each (location, metric, issue time) hourly series is stored as one SQLite row holding
+a compressed float32 block: values are packed little-endian (NaN for missing),
+XOR-delta encoded against the previous value's bit pattern (lossless, and slowly
+varying series turn into mostly-zero words) and zlib-compressed. Rows are indexed by
+(location, metric, issue time) and (location, metric, valid start), so "every
+forecast for valid time T" and "change between consecutive runs" read a handful of
+small blocks regardless of archive size.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+HOUR_MS = 3600 * 1000
+
+# Longest hourly series we expect per issuance (NWS hourly runs ~7 days); bounds valid-time scans.
+MAX_SERIES_SPAN_MS = 10 * 24 * HOUR_MS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    location TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    issue_ms INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    block BLOB NOT NULL,
+    PRIMARY KEY (location, metric, issue_ms)
+);
+CREATE INDEX IF NOT EXISTS series_valid ON series (location, metric, start_ms);
+CREATE TABLE IF NOT EXISTS cycles (
+    fetched_ms INTEGER PRIMARY KEY,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+
+def _to_ms(value: str) -> int:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        # Naive times (e.g. /api/history's valid/issue parameters) are UTC, not host-local.
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _from_ms(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def encode_block(values: Iterable[Optional[float]]) -> bytes:
+    """Pack values as XOR-delta float32 words and zlib-compress them."""
+    floats = array("f", (math.nan if v is None else v for v in values))
+    words = array("I", floats.tobytes())
+    prev = 0
+    for i, word in enumerate(words):
+        words[i], prev = word ^ prev, word
+    if sys.byteorder == "big":
+        words.byteswap()
+    return zlib.compress(words.tobytes(), 6)
+
+
+def decode_block(block: bytes) -> List[Optional[float]]:
+    """Inverse of encode_block; NaN comes back as None."""
+    words = array("I")
+    words.frombytes(zlib.decompress(block))
+    if sys.byteorder == "big":
+        words.byteswap()
+    prev = 0
+    for i, word in enumerate(words):
+        prev ^= word
+        words[i] = prev
+    floats = array("f", words.tobytes())
+    return [None if math.isnan(v) else v for v in floats]
+
+
+class ForecastArchive:
+    """SQLite-backed forecast history. Safe to share across threads (one connection per call)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def append_snapshot(self, snapshot: Dict) -> int:
+        """Archive every location/metric series of a locations.json snapshot. Returns rows added.
+
+        A series is keyed by the NWS issuance ("updated"), so refetching an unchanged
+        forecast adds nothing.
+        """
+        fetched_ms = _to_ms(snapshot["fetchedAt"])
+        rows = []
+        for loc in snapshot.get("locations", []):
+            hourly = loc.get("hourly") or []
+            if loc.get("error") or not hourly:
+                continue
+            issue_ms = _to_ms(loc["updated"]) if loc.get("updated") else fetched_ms
+            times = [_to_ms(h["time"]) for h in hourly]
+            start_ms, end_ms = times[0], times[-1]
+            slots = (end_ms - start_ms) // HOUR_MS + 1
+            index = [(t - start_ms) // HOUR_MS for t in times]
+            for metric in loc.get("metrics", []):
+                key = metric["key"]
+                values: List[Optional[float]] = [None] * slots
+                for i, h in zip(index, hourly):
+                    values[i] = h["metrics"].get(key)
+                rows.append((loc["name"], key, issue_ms, start_ms, end_ms, slots, encode_block(values)))
+
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO series VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            added = conn.total_changes - before
+            conn.execute(
+                "INSERT OR IGNORE INTO cycles VALUES (?, ?)", (fetched_ms, snapshot["fetchedAt"])
+            )
+        return added
+
+    def forecasts_for_valid_time(self, location: str, metric: str, valid: str) -> List[Dict]:
+        """Every archived forecast of `metric` at `location` for valid time `valid`, oldest issue first."""
+        valid_ms = _to_ms(valid)
+        valid_ms -= valid_ms % HOUR_MS
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT issue_ms, start_ms, block FROM series"
+                " WHERE location = ? AND metric = ? AND start_ms BETWEEN ? AND ? AND end_ms >= ?"
+                " ORDER BY issue_ms",
+                (location, metric, valid_ms - MAX_SERIES_SPAN_MS, valid_ms, valid_ms),
+            ).fetchall()
+        result = []
+        for issue_ms, start_ms, block in rows:
+            values = decode_block(block)
+            result.append({
+                "issued": _from_ms(issue_ms),
+                "leadHours": (valid_ms - issue_ms) / HOUR_MS,
+                "value": values[(valid_ms - start_ms) // HOUR_MS],
+            })
+        return result
+
+    def run_to_run_change(self, location: str, metric: str, issue: Optional[str] = None) -> Optional[Dict]:
+        """Hour-by-hour change of `metric` between an issuance (default: latest) and the one before it."""
+        with self._connect() as conn:
+            if issue is None:
+                newer = conn.execute(
+                    "SELECT issue_ms, start_ms, block FROM series WHERE location = ? AND metric = ?"
+                    " ORDER BY issue_ms DESC LIMIT 1",
+                    (location, metric),
+                ).fetchone()
+            else:
+                newer = conn.execute(
+                    "SELECT issue_ms, start_ms, block FROM series WHERE location = ? AND metric = ?"
+                    " AND issue_ms <= ? ORDER BY issue_ms DESC LIMIT 1",
+                    (location, metric, _to_ms(issue)),
+                ).fetchone()
+            if newer is None:
+                return None
+            older = conn.execute(
+                "SELECT issue_ms, start_ms, block FROM series WHERE location = ? AND metric = ?"
+                " AND issue_ms < ? ORDER BY issue_ms DESC LIMIT 1",
+                (location, metric, newer[0]),
+            ).fetchone()
+
+        new_values = decode_block(newer[2])
+        old_values = decode_block(older[2]) if older else []
+        changes = []
+        for i, current in enumerate(new_values):
+            t = newer[1] + i * HOUR_MS
+            j = (t - older[1]) // HOUR_MS if older else -1
+            previous = old_values[j] if 0 <= j < len(old_values) else None
+            changes.append({
+                "time": _from_ms(t),
+                "previous": previous,
+                "current": current,
+                "delta": None if previous is None or current is None else current - previous,
+            })
+        return {
+            "issued": _from_ms(newer[0]),
+            "previousIssued": _from_ms(older[0]) if older else None,
+            "changes": changes,
+        }
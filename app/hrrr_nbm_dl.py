@@ -1,17 +1,25 @@
 from __future__ import annotations
 
 import hashlib
+import json
+import logging
 import math
 import os
 import re
 import time
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence, Tuple
 from urllib.parse import urlencode
 
 import requests
 
+from .metrics import UPSTREAM_BYTES, UPSTREAM_ERRORS, UPSTREAM_LATENCY, UPSTREAM_RETRIES
+from .profiling import span
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass(frozen=True)
 class BBox:
@@ -35,13 +43,69 @@ class Cycle:
     yyyymmdd: str      # e.g. "20260129"
     hour: int          # 0-23
 
+    @property
+    def init_time(self) -> datetime:
+        return datetime.strptime(self.yyyymmdd, "%Y%m%d").replace(hour=self.hour, tzinfo=timezone.utc)
+
+    @classmethod
+    def at(cls, model: str, when: datetime) -> "Cycle":
+        return cls(model, when.strftime("%Y%m%d"), when.hour)
+
+    def shifted(self, hours: int) -> "Cycle":
+        return Cycle.at(self.model, self.init_time + timedelta(hours=hours))
+
+
+NOMADS_PROD = "https://nomads.ncep.noaa.gov/pub/data/nccf/com"
 
-def _listdir_hrefs(url: str, session: requests.Session, timeout: int = 20) -> List[str]:
-    """Parse NOMADS-style directory listing hrefs."""
-    r = session.get(url, timeout=timeout)
-    r.raise_for_status()
+# Typical delay between cycle init time and the first forecast file appearing on NOMADS.
+# Both models run hourly; these are used to predict which cycle should exist right now.
+PUBLISH_LATENCY = {
+    "hrrr": timedelta(minutes=50),
+    "nbm": timedelta(minutes=70),
+}
+
+# (etag, last_modified, hrefs) keyed by listing URL
+ListingCache = Dict[str, Tuple[Optional[str], Optional[str], List[str]]]
+
+
+def _listdir_hrefs(
+    url: str,
+    session: requests.Session,
+    timeout: int = 20,
+    cache: Optional[ListingCache] = None,
+) -> List[str]:
+    """Parse NOMADS-style directory listing hrefs.
+
+    With a cache, the listing is revalidated with If-None-Match/If-Modified-Since
+    and a 304 response reuses the previously parsed hrefs.
+    """
+    headers: Dict[str, str] = {}
+    cached = cache.get(url) if cache is not None else None
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    start = time.perf_counter()
+    try:
+        r = session.get(url, timeout=timeout, headers=headers)
+        if not (cached and r.status_code == 304):
+            r.raise_for_status()
+    except requests.RequestException:
+        UPSTREAM_ERRORS.inc(endpoint="listing")
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint="listing")
+    if cached and r.status_code == 304:
+        return cached[2]
+    UPSTREAM_BYTES.inc(len(r.content), endpoint="listing")
     # Directory listings are simple <a href="name">name</a>
-    return re.findall(r'href="([^"]+)"', r.text)
+    hrefs = re.findall(r'href="([^"]+)"', r.text)
+    if cache is not None:
+        cache[url] = (r.headers.get("ETag"), r.headers.get("Last-Modified"), hrefs)
+    return hrefs
 
 
 def _stable_hash(parts: Sequence[str], n: int = 10) -> str:
@@ -76,14 +140,65 @@ def bbox_from_points(points: Sequence[Tuple[float, float]], padding_km: float =
     ).normalized()
 
 
-def _latest_hrrr_cycle(session: requests.Session) -> Cycle:
+def _bbox_tag(bbox: BBox) -> str:
+    return _stable_hash([f"{bbox.leftlon:.6f}", f"{bbox.rightlon:.6f}", f"{bbox.toplat:.6f}", f"{bbox.bottomlat:.6f}"], 12)
+
+
+def _bbox_cells(bbox: BBox, grid_km: float = 3.0) -> float:
+    """Approximate number of model grid cells inside a bbox (HRRR is 3 km, NBM 2.5 km)."""
+    mid_lat = 0.5 * (bbox.toplat + bbox.bottomlat)
+    height_km = (bbox.toplat - bbox.bottomlat) * 111.0
+    width_km = (bbox.rightlon - bbox.leftlon) * 111.0 * max(0.1, abs(math.cos(math.radians(mid_lat))))
+    return height_km * width_km / (grid_km * grid_km)
+
+
+def cluster_bboxes(
+    points: Sequence[Tuple[float, float]],
+    padding_km: float = 50.0,
+    bytes_per_cell: float = 8.0,
+    request_cost_bytes: float = 32 * 1024,
+) -> List[Tuple[BBox, List[int]]]:
+    """
+    Group points into padded tiles, trading subset bytes against request count.
+
+    A tile costs `request_cost_bytes` (per-request overhead of one filter call, expressed
+    as equivalent transfer) plus `bytes_per_cell` per grid cell, per forecast hour. Starting
+    from one tile per point, the pair whose union saves the most is merged until no merge
+    is cheaper than keeping tiles apart. Returns (bbox, point indices) per tile.
+    """
+    def cost(bbox: BBox) -> float:
+        return request_cost_bytes + _bbox_cells(bbox) * bytes_per_cell
+
+    clusters = [[i] for i in range(len(points))]
+    boxes = [bbox_from_points([p], padding_km=padding_km) for p in points]
+
+    while len(clusters) > 1:
+        best = None
+        for a in range(len(clusters)):
+            for b in range(a + 1, len(clusters)):
+                members = clusters[a] + clusters[b]
+                merged = bbox_from_points([points[i] for i in members], padding_km=padding_km)
+                saving = cost(boxes[a]) + cost(boxes[b]) - cost(merged)
+                if saving > 0 and (best is None or saving > best[0]):
+                    best = (saving, a, b, merged)
+        if best is None:
+            break
+        _, a, b, merged = best
+        clusters[a] = clusters[a] + clusters[b]
+        boxes[a] = merged
+        del clusters[b], boxes[b]
+
+    return list(zip(boxes, clusters))
+
+
+def _latest_hrrr_cycle(session: requests.Session, cache: Optional[ListingCache] = None) -> Cycle:
     """
     Find newest HRRR cycle by directory listing:
       /pub/data/nccf/com/hrrr/prod/ -> hrrr.YYYYMMDD/
       /pub/data/nccf/com/hrrr/prod/hrrr.YYYYMMDD/conus/ -> files hrrr.tHHz.wrfsfcf00.grib2
     """
-    root = "https://nomads.ncep.noaa.gov/pub/data/nccf/com/hrrr/prod/"
-    hrefs = _listdir_hrefs(root, session)
+    root = f"{NOMADS_PROD}/hrrr/prod/"
+    hrefs = _listdir_hrefs(root, session, cache=cache)
     dates = sorted(
         {m.group(1) for h in hrefs if (m := re.match(r"hrrr\.(\d{8})/", h))}
     )
@@ -92,7 +207,7 @@ def _latest_hrrr_cycle(session: requests.Session) -> Cycle:
     yyyymmdd = dates[-1]
 
     conus = f"{root}hrrr.{yyyymmdd}/conus/"
-    fhrefs = _listdir_hrefs(conus, session)
+    fhrefs = _listdir_hrefs(conus, session, cache=cache)
     hours = sorted(
         {int(m.group(1)) for h in fhrefs if (m := re.match(r"hrrr\.t(\d{2})z\.wrfsfcf00\.grib2$", h))}
     )
@@ -101,15 +216,15 @@ def _latest_hrrr_cycle(session: requests.Session) -> Cycle:
     return Cycle("hrrr", yyyymmdd, hours[-1])
 
 
-def _latest_nbm_cycle(session: requests.Session) -> Cycle:
+def _latest_nbm_cycle(session: requests.Session, cache: Optional[ListingCache] = None) -> Cycle:
     """
     Find newest NBM cycle by directory listing:
       /pub/data/nccf/com/blend/prod/ -> blend.YYYYMMDD/
       /pub/data/nccf/com/blend/prod/blend.YYYYMMDD/ -> HH/ dirs
     Prefer the latest HH that actually contains core/ with at least one .co.grib2 file.
     """
-    root = "https://nomads.ncep.noaa.gov/pub/data/nccf/com/blend/prod/"
-    hrefs = _listdir_hrefs(root, session)
+    root = f"{NOMADS_PROD}/blend/prod/"
+    hrefs = _listdir_hrefs(root, session, cache=cache)
     dates = sorted(
         {m.group(1) for h in hrefs if (m := re.match(r"blend\.(\d{8})/", h))}
     )
@@ -118,7 +233,7 @@ def _latest_nbm_cycle(session: requests.Session) -> Cycle:
     yyyymmdd = dates[-1]
 
     day = f"{root}blend.{yyyymmdd}/"
-    hh_hrefs = _listdir_hrefs(day, session)
+    hh_hrefs = _listdir_hrefs(day, session, cache=cache)
     hours = sorted({int(m.group(1)) for h in hh_hrefs if (m := re.match(r"(\d{2})/", h))}, reverse=True)
     if not hours:
         raise RuntimeError(f"Could not find BLEND cycle-hour dirs in {day}")
@@ -127,7 +242,7 @@ def _latest_nbm_cycle(session: requests.Session) -> Cycle:
     for hh in hours:
         core = f"{day}{hh:02d}/core/"
         try:
-            core_hrefs = _listdir_hrefs(core, session)
+            core_hrefs = _listdir_hrefs(core, session, cache=cache)
         except requests.HTTPError:
             continue
         # Any CONUS core file for that cycle is enough to declare "available"
@@ -138,6 +253,76 @@ def _latest_nbm_cycle(session: requests.Session) -> Cycle:
     raise RuntimeError(f"Could not find a usable BLEND core listing in {day}")
 
 
+def _cycle_marker_url(cycle: Cycle) -> str:
+    """URL of the first file a cycle publishes; its presence marks the cycle as available."""
+    if cycle.model == "hrrr":
+        return f"{NOMADS_PROD}/hrrr/prod/hrrr.{cycle.yyyymmdd}/conus/hrrr.t{cycle.hour:02d}z.wrfsfcf00.grib2"
+    return (
+        f"{NOMADS_PROD}/blend/prod/blend.{cycle.yyyymmdd}/{cycle.hour:02d}/core/"
+        f"blend.t{cycle.hour:02d}z.core.f001.co.grib2"
+    )
+
+
+class CycleDiscovery:
+    """
+    Schedule-aware latest-cycle lookup that avoids rescanning NOMADS listings.
+
+    Both models run hourly, so the newest cycle that *should* exist is predictable from
+    the clock and PUBLISH_LATENCY. Once a cycle is known, a lookup costs nothing until
+    the next cycle is due, then a single HEAD on that cycle's marker file. Full listing
+    scans (revalidated with conditional requests) are only a cold-start/recovery fallback.
+    """
+
+    _SCANNERS = {"hrrr": _latest_hrrr_cycle, "nbm": _latest_nbm_cycle}
+
+    def __init__(self, session: Optional[requests.Session] = None, probe_timeout: int = 10):
+        self.session = session or requests.Session()
+        self.probe_timeout = probe_timeout
+        self.listing_cache: ListingCache = {}
+        self.known: Dict[str, Cycle] = {}
+
+    def expected_cycle(self, model: str, now: Optional[datetime] = None) -> Cycle:
+        """Newest cycle whose publication time has passed according to the schedule."""
+        now = now or datetime.now(timezone.utc)
+        due = (now - PUBLISH_LATENCY[model]).replace(minute=0, second=0, microsecond=0)
+        return Cycle.at(model, due)
+
+    def _probe(self, cycle: Cycle) -> bool:
+        with UPSTREAM_LATENCY.time(endpoint="probe"):
+            r = self.session.head(_cycle_marker_url(cycle), timeout=self.probe_timeout, allow_redirects=True)
+        return r.status_code == 200
+
+    def latest(self, model: str, now: Optional[datetime] = None) -> Cycle:
+        expected = self.expected_cycle(model, now)
+        known = self.known.get(model)
+        if known is not None and known.init_time >= expected.init_time:
+            return known
+
+        # Probe the predicted cycle, then one earlier in case publication is running late.
+        for candidate in (expected, expected.shifted(-1)):
+            if known is not None and candidate.init_time <= known.init_time:
+                return known
+            if self._probe(candidate):
+                self.known[model] = candidate
+                return candidate
+
+        cycle = self._SCANNERS[model](self.session, cache=self.listing_cache)
+        if known is None or cycle.init_time > known.init_time:
+            self.known[model] = cycle
+        return self.known[model]
+
+    def available_fhrs(self, cycle: Cycle) -> List[int]:
+        """Forecast hours of `cycle` already posted, from its (conditionally revalidated) listing."""
+        if cycle.model == "hrrr":
+            url = f"{NOMADS_PROD}/hrrr/prod/hrrr.{cycle.yyyymmdd}/conus/"
+            pattern = rf"hrrr\.t{cycle.hour:02d}z\.wrfsfcf(\d{{2}})\.grib2$"
+        else:
+            url = f"{NOMADS_PROD}/blend/prod/blend.{cycle.yyyymmdd}/{cycle.hour:02d}/core/"
+            pattern = rf"blend\.t{cycle.hour:02d}z\.core\.f(\d{{3}})\.co\.grib2$"
+        hrefs = _listdir_hrefs(url, self.session, cache=self.listing_cache)
+        return sorted({int(m.group(1)) for h in hrefs if (m := re.match(pattern, h))})
+
+
 def _build_filter_url(
     base: str,
     dir_value: str,
@@ -165,27 +350,240 @@ def _build_filter_url(
     return f"{base}?{urlencode(params)}"
 
 
+class DownloadVerificationError(RuntimeError):
+    """A downloaded subset failed size or GRIB2 framing checks."""
+
+
+def _manifest_path(path: Path) -> Path:
+    return path.with_suffix(path.suffix + ".manifest.json")
+
+
+def _read_manifest(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        with open(_manifest_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(path: Path, manifest: Dict[str, object]) -> None:
+    tmp = _manifest_path(path).with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, _manifest_path(path))
+
+
+def _count_grib2_messages(path: Path) -> int:
+    """
+    Walk GRIB2 message framing: each message starts with "GRIB", carries its total
+    length as a big-endian uint64 at bytes 8..16 of section 0, and ends with "7777".
+    Raises DownloadVerificationError on anything else (HTML error pages, truncation).
+    """
+    size = path.stat().st_size
+    count = 0
+    offset = 0
+    with open(path, "rb") as f:
+        while offset < size:
+            f.seek(offset)
+            header = f.read(16)
+            if len(header) < 16 or header[:4] != b"GRIB":
+                raise DownloadVerificationError(f"{path.name}: no GRIB header at byte {offset}")
+            if header[7] != 2:
+                raise DownloadVerificationError(f"{path.name}: unsupported GRIB edition {header[7]}")
+            length = int.from_bytes(header[8:16], "big")
+            if length < 20 or offset + length > size:
+                raise DownloadVerificationError(f"{path.name}: truncated message at byte {offset}")
+            f.seek(offset + length - 4)
+            if f.read(4) != b"7777":
+                raise DownloadVerificationError(f"{path.name}: missing 7777 terminator at byte {offset}")
+            offset += length
+            count += 1
+    if count == 0:
+        raise DownloadVerificationError(f"{path.name}: empty file")
+    return count
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _verify_grib2(path: Path, url: str, expected_messages: Optional[int]) -> Dict[str, object]:
+    """Check framing and message count, returning the manifest to record for `path`."""
+    messages = _count_grib2_messages(path)
+    if expected_messages is not None and messages < expected_messages:
+        raise DownloadVerificationError(
+            f"{path.name}: expected at least {expected_messages} GRIB messages, got {messages}"
+        )
+    return {
+        "url": url,
+        "size": path.stat().st_size,
+        "sha256": _sha256_file(path),
+        "messages": messages,
+        "verified": True,
+        "verified_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 def _download_if_needed(
     url: str,
     out_path: Path,
     session: requests.Session,
     timeout: int = 120,
+    expected_messages: Optional[int] = None,
 ) -> Path:
+    """
+    Download `url` to `out_path` unless a verified copy is already cached.
+
+    Interrupted transfers resume from the ".part" file with an HTTP Range request
+    (falling back to a full download when the server ignores it). The result is checked
+    against Content-Length/Content-Range and GRIB2 framing before the atomic rename, and
+    a "<file>.manifest.json" sidecar records its hash and verification state.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    if out_path.exists() and out_path.stat().st_size > 0:
-        return out_path
+    if out_path.exists():
+        manifest = _read_manifest(out_path)
+        if manifest and manifest.get("verified") and manifest.get("size") == out_path.stat().st_size:
+            return out_path
+        # Cached before manifests existed (or manifest lost): verify in place.
+        try:
+            _write_manifest(out_path, _verify_grib2(out_path, url, expected_messages))
+            return out_path
+        except DownloadVerificationError:
+            out_path.unlink()
 
     tmp = out_path.with_suffix(out_path.suffix + ".part")
-    with session.get(url, stream=True, timeout=timeout) as r:
-        r.raise_for_status()
-        with open(tmp, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
+    resume_from = tmp.stat().st_size if tmp.exists() else 0
+    # Byte offsets (Range, Content-Length) refer to the body as sent, so ask for it unencoded.
+    headers = {"Accept-Encoding": "identity"}
+    if resume_from:
+        headers["Range"] = f"bytes={resume_from}-"
+    if resume_from:
+        UPSTREAM_RETRIES.inc(endpoint="filter")
+
+    start = time.perf_counter()
+    received = 0
+    try:
+        with session.get(url, stream=True, timeout=timeout, headers=headers) as r:
+            if r.status_code == 416:
+                # Range not satisfiable: the partial file is unusable, start over next time.
+                tmp.unlink()
+            r.raise_for_status()
+
+            if r.status_code == 206:
+                mode = "ab"
+                total = r.headers.get("Content-Range", "").rpartition("/")[2]
+                expected_size = int(total) if total.isdigit() else None
+            else:
+                mode, resume_from = "wb", 0
+                length = r.headers.get("Content-Length")
+                expected_size = int(length) if length and length.isdigit() else None
+
+            with open(tmp, mode) as f:
+                # Raw bytes, not iter_content: a Content-Encoding must not be decoded away, or
+                # the size checks and the next resume offset no longer match the server's.
+                for chunk in r.raw.stream(1024 * 1024, decode_content=False):
+                    if chunk:
+                        f.write(chunk)
+                        received += len(chunk)
+    except requests.RequestException:
+        UPSTREAM_ERRORS.inc(endpoint="filter")
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint="filter")
+        UPSTREAM_BYTES.inc(received, endpoint="filter")
+
+    actual_size = tmp.stat().st_size
+    if expected_size is not None and actual_size < expected_size:
+        # Short read: keep the .part so the next attempt resumes from here.
+        UPSTREAM_ERRORS.inc(endpoint="filter")
+        raise DownloadVerificationError(
+            f"{out_path.name}: incomplete transfer ({actual_size} of {expected_size} bytes)"
+        )
+    try:
+        if expected_size is not None and actual_size != expected_size:
+            raise DownloadVerificationError(
+                f"{out_path.name}: size mismatch ({actual_size} != {expected_size} bytes)"
+            )
+        manifest = _verify_grib2(tmp, url, expected_messages)
+    except DownloadVerificationError:
+        UPSTREAM_ERRORS.inc(endpoint="filter")
+        tmp.unlink()
+        raise
+
     os.replace(tmp, out_path)
+    _write_manifest(out_path, manifest)
     return out_path
 
 
+class _Throttle:
+    """Spaces NOMADS downloads at least `min_delay_s` apart, across models and tiles."""
+
+    def __init__(self, min_delay_s: float):
+        self.min_delay_s = min_delay_s
+        self._last: Optional[float] = None
+
+    def wait(self) -> None:
+        if self._last is not None and self.min_delay_s:
+            time.sleep(max(0.0, self._last + self.min_delay_s - time.monotonic()))
+
+    def mark(self) -> None:
+        self._last = time.monotonic()
+
+
+def _ingest_cycle(
+    cycle: Cycle,
+    fhrs: Sequence[int],
+    available: Optional[Sequence[int]],
+    source_for,
+    previous_entries: Sequence[Dict[str, object]],
+    session: requests.Session,
+    throttle: _Throttle,
+) -> Tuple[List[Dict[str, object]], List[int]]:
+    """
+    Download whichever forecast hours of `cycle` are posted, tolerating the rest.
+
+    `source_for(fhr)` returns (url, out_path, expected_messages). Hours that are not
+    posted yet (or fail to download/verify) are filled from `previous_entries` with the
+    same valid time, so a partially published cycle can still be served. Returns the
+    entries and the fhrs of `cycle` still missing. Uncached downloads wait on the
+    shared `throttle`.
+    """
+    fallback = {
+        str(x["valid_time"]): x for x in previous_entries if Path(str(x["path"])).exists()
+    }
+    entries: List[Dict[str, object]] = []
+    missing: List[int] = []
+
+    for fhr in fhrs:
+        url, out_path, expected = source_for(fhr)
+        valid_time = (cycle.init_time + timedelta(hours=fhr)).isoformat()
+        cached = out_path.exists()
+
+        if cached or available is None or fhr in available:
+            if not cached:
+                throttle.wait()
+            try:
+                path = _download_if_needed(url, out_path, session, expected_messages=expected)
+                entries.append({"fhr": fhr, "cycle": cycle, "valid_time": valid_time, "url": url, "path": str(path)})
+                if not cached:
+                    throttle.mark()
+                continue
+            except (requests.RequestException, DownloadVerificationError) as e:
+                throttle.mark()
+                logger.warning("[HRRR] %s f%03d not ingested: %s", cycle.model, fhr, e)
+
+        missing.append(fhr)
+        prior = fallback.get(valid_time)
+        if prior is not None:
+            entries.append({**prior, "fhr": fhr, "fallback": True})
+
+    return entries, missing
+
+
 def sync_hrrr_nbm_subsets(
     locations: Sequence[Dict[str, float]],
     cache_dir: str | Path,
@@ -200,73 +598,145 @@ def sync_hrrr_nbm_subsets(
     hrrr_levels: Sequence[str] = ("surface",),
     nbm_levels: Sequence[str] = ("surface",),
     min_delay_s: float = 10.0,  # be polite to NOMADS filter endpoints
+    # Tiling cost model (see cluster_bboxes); a huge request cost yields a single union box
+    request_cost_bytes: float = 32 * 1024,
     session: Optional[requests.Session] = None,
+    discovery: Optional[CycleDiscovery] = None,
+    previous: Optional[Dict[str, object]] = None,
 ) -> Dict[str, object]:
     """
-    1) Find newest HRRR and NBM cycles via NOMADS directory listings
-    2) Generate filter URLs for a padded bbox covering your locations
-    3) Download + cache GRIB2 subsets with deterministic filenames
+    1) Find newest HRRR and NBM cycles (schedule-aware via CycleDiscovery)
+    2) Cluster locations into padded tiles and generate filter URLs per tile
+    3) Download + cache the GRIB2 subsets already posted for those cycles
+
+    Returns metadata including chosen cycles, tiles, urls, and local paths. "tiles" lists
+    each tile's bbox, bbox_tag and member locations, "location_tiles" maps location name
+    to bbox_tag, and every hrrr/nbm entry carries the "tile" it was cut for. "bbox" is
+    the union of all tiles.
 
-    Returns metadata including chosen cycles, bbox, urls, and local paths.
+    Forecast hours are published gradually, so a cycle may be ingested in several passes.
+    Hours not yet posted (in any tile) are listed under "missing" and served from the
+    previous result's file for the same tile and valid time (entries flagged "fallback");
+    "complete" is True once nothing is missing.
+
+    Pass the same `discovery` and the previous return value as `previous` across calls:
+    if neither cycle nor the request fingerprint changed, the previous result was
+    complete and every file is still on disk, the previous metadata is returned with
+    "unchanged": True and nothing is downloaded.
 
     Notes:
     - Uses NOMADS filter endpoints (server-side subsetting). For high volume, consider S3 + local subsetting.
     - Deterministic filenames include model/cycle/fhr + hashes of bbox & varset.
     """
     sess = session or requests.Session()
+    disc = discovery or CycleDiscovery(sess)
     cache = Path(cache_dir)
 
     points = [(float(x["lat"]), float(x["lon"])) for x in locations]
+    names = [str(x.get("name", i)) for i, x in enumerate(locations)]
+    tiles = [
+        {"bbox": tile_bbox.normalized(), "bbox_tag": _bbox_tag(tile_bbox.normalized()), "locations": [names[i] for i in members]}
+        for tile_bbox, members in cluster_bboxes(points, padding_km=padding_km, request_cost_bytes=request_cost_bytes)
+    ]
     bbox = bbox_from_points(points, padding_km=padding_km).normalized()
-    bbox_tag = _stable_hash([f"{bbox.leftlon:.6f}", f"{bbox.rightlon:.6f}", f"{bbox.toplat:.6f}", f"{bbox.bottomlat:.6f}"], 12)
+    hrrr_var_tag = _stable_hash(sorted(hrrr_vars) + [f"lev:{x}" for x in sorted(hrrr_levels)], 10)
+    nbm_var_tag = _stable_hash(sorted(nbm_vars) + [f"lev:{x}" for x in sorted(nbm_levels)], 10)
+    fingerprint = _stable_hash(
+        [*sorted(t["bbox_tag"] for t in tiles), hrrr_var_tag, nbm_var_tag, str(cache),
+         ",".join(map(str, hrrr_fhrs)), ",".join(map(str, nbm_fhrs))],
+        12,
+    )
 
-    hrrr_cycle = _latest_hrrr_cycle(sess)
-    nbm_cycle = _latest_nbm_cycle(sess)
+    with span("discovery"):
+        hrrr_cycle = disc.latest("hrrr")
+        nbm_cycle = disc.latest("nbm")
+
+    same_request = previous is not None and previous.get("fingerprint") == fingerprint
+    if (
+        same_request
+        and previous.get("complete")
+        and previous.get("hrrr_cycle") == hrrr_cycle
+        and previous.get("nbm_cycle") == nbm_cycle
+        and all(Path(x["path"]).exists() for x in [*previous["hrrr"], *previous["nbm"]])
+    ):
+        return {**previous, "unchanged": True}
+
+    def posted(cycle: Cycle) -> Optional[List[int]]:
+        try:
+            return disc.available_fhrs(cycle)
+        except requests.RequestException as e:
+            # Without a listing, just attempt every hour and let failures fall back.
+            logger.warning("[HRRR] Could not list posted hours for %s: %s", cycle, e)
+            return None
+
+    with span("posted_listing"):
+        hrrr_posted = posted(hrrr_cycle)
+        nbm_posted = posted(nbm_cycle)
+    hrrr_base = "https://nomads.ncep.noaa.gov/cgi-bin/filter_hrrr_2d.pl"
+    nbm_base = "https://nomads.ncep.noaa.gov/cgi-bin/filter_blend.pl"
 
     results: Dict[str, object] = {
         "bbox": bbox,
+        "tiles": tiles,
+        "location_tiles": {name: t["bbox_tag"] for t in tiles for name in t["locations"]},
+        "fingerprint": fingerprint,
+        "unchanged": False,
         "hrrr_cycle": hrrr_cycle,
         "nbm_cycle": nbm_cycle,
         "hrrr": [],
         "nbm": [],
     }
-
-    # --- HRRR downloads ---
-    hrrr_base = "https://nomads.ncep.noaa.gov/cgi-bin/filter_hrrr_2d.pl"
-    hrrr_var_tag = _stable_hash(sorted(hrrr_vars) + [f"lev:{x}" for x in sorted(hrrr_levels)], 10)
-
-    for i, fhr in enumerate(hrrr_fhrs):
-        file_value = f"hrrr.t{hrrr_cycle.hour:02d}z.wrfsfcf{fhr:02d}.grib2"
-        dir_value = f"/hrrr.{hrrr_cycle.yyyymmdd}/conus"
-        url = _build_filter_url(hrrr_base, dir_value, file_value, bbox, hrrr_vars, hrrr_levels)
-
-        out_name = f"hrrr_{hrrr_cycle.yyyymmdd}_t{hrrr_cycle.hour:02d}_f{fhr:02d}_{bbox_tag}_{hrrr_var_tag}.grib2"
-        out_path = cache / "hrrr" / hrrr_cycle.yyyymmdd / f"t{hrrr_cycle.hour:02d}" / out_name
-
-        path = _download_if_needed(url, out_path, sess)
-        results["hrrr"].append({"fhr": fhr, "url": url, "path": str(path)})
-
-        if min_delay_s and i != len(hrrr_fhrs) - 1:
-            time.sleep(min_delay_s)
-
-    # --- NBM downloads ---
-    nbm_base = "https://nomads.ncep.noaa.gov/cgi-bin/filter_blend.pl"
-    nbm_var_tag = _stable_hash(sorted(nbm_vars) + [f"lev:{x}" for x in sorted(nbm_levels)], 10)
-
-    for i, fhr in enumerate(nbm_fhrs):
-        file_value = f"blend.t{nbm_cycle.hour:02d}z.core.f{fhr:03d}.co.grib2"
-        dir_value = f"/blend.{nbm_cycle.yyyymmdd}/{nbm_cycle.hour:02d}/core"
-        url = _build_filter_url(nbm_base, dir_value, file_value, bbox, nbm_vars, nbm_levels)
-
-        out_name = f"nbm_{nbm_cycle.yyyymmdd}_t{nbm_cycle.hour:02d}_f{fhr:03d}_{bbox_tag}_{nbm_var_tag}.grib2"
-        out_path = cache / "nbm" / nbm_cycle.yyyymmdd / f"t{nbm_cycle.hour:02d}" / out_name
-
-        path = _download_if_needed(url, out_path, sess)
-        results["nbm"].append({"fhr": fhr, "url": url, "path": str(path)})
-
-        if min_delay_s and i != len(nbm_fhrs) - 1:
-            time.sleep(min_delay_s)
-
+    hrrr_missing: set = set()
+    nbm_missing: set = set()
+    throttle = _Throttle(min_delay_s)
+
+    for tile in tiles:
+        tile_bbox, bbox_tag = tile["bbox"], tile["bbox_tag"]
+
+        def tile_previous(model: str) -> List[Dict[str, object]]:
+            return [x for x in previous[model] if x.get("tile") == bbox_tag] if same_request else []
+
+        # --- HRRR downloads ---
+        def hrrr_source(fhr: int):
+            file_value = f"hrrr.t{hrrr_cycle.hour:02d}z.wrfsfcf{fhr:02d}.grib2"
+            dir_value = f"/hrrr.{hrrr_cycle.yyyymmdd}/conus"
+            url = _build_filter_url(hrrr_base, dir_value, file_value, tile_bbox, hrrr_vars, hrrr_levels)
+
+            out_name = f"hrrr_{hrrr_cycle.yyyymmdd}_t{hrrr_cycle.hour:02d}_f{fhr:02d}_{bbox_tag}_{hrrr_var_tag}.grib2"
+            out_path = cache / "hrrr" / hrrr_cycle.yyyymmdd / f"t{hrrr_cycle.hour:02d}" / out_name
+
+            # Every requested HRRR surface field is present from f01 on (accumulations are absent at f00).
+            expected = len(hrrr_vars) * len(hrrr_levels) if fhr > 0 else None
+            return url, out_path, expected
+
+        with span("hrrr_ingest"):
+            entries, missing = _ingest_cycle(
+                hrrr_cycle, hrrr_fhrs, hrrr_posted, hrrr_source, tile_previous("hrrr"), sess, throttle
+            )
+        results["hrrr"].extend({**x, "tile": bbox_tag} for x in entries)
+        hrrr_missing.update(missing)
+
+        # --- NBM downloads ---
+        def nbm_source(fhr: int):
+            file_value = f"blend.t{nbm_cycle.hour:02d}z.core.f{fhr:03d}.co.grib2"
+            dir_value = f"/blend.{nbm_cycle.yyyymmdd}/{nbm_cycle.hour:02d}/core"
+            url = _build_filter_url(nbm_base, dir_value, file_value, tile_bbox, nbm_vars, nbm_levels)
+
+            out_name = f"nbm_{nbm_cycle.yyyymmdd}_t{nbm_cycle.hour:02d}_f{fhr:03d}_{bbox_tag}_{nbm_var_tag}.grib2"
+            out_path = cache / "nbm" / nbm_cycle.yyyymmdd / f"t{nbm_cycle.hour:02d}" / out_name
+
+            # NBM fields vary by forecast hour (e.g. 6-hourly accumulations), so only require framing.
+            return url, out_path, None
+
+        with span("nbm_ingest"):
+            entries, missing = _ingest_cycle(
+                nbm_cycle, nbm_fhrs, nbm_posted, nbm_source, tile_previous("nbm"), sess, throttle
+            )
+        results["nbm"].extend({**x, "tile": bbox_tag} for x in entries)
+        nbm_missing.update(missing)
+
+    results["missing"] = {"hrrr": sorted(hrrr_missing), "nbm": sorted(nbm_missing)}
+    results["complete"] = not hrrr_missing and not nbm_missing
     return results
 
 
@@ -290,5 +760,7 @@ if __name__ == "__main__":
         min_delay_s=10.0,
     )
     print(meta["hrrr_cycle"], meta["nbm_cycle"])
+    for tile in meta["tiles"]:
+        print("Tile", tile["bbox_tag"], tile["locations"])
     print("HRRR files:", len(meta["hrrr"]))
     print("NBM files:", len(meta["nbm"]))
@@ -0,0 +1,327 @@
+"""Localhost load test for the dashboard's serving path.
+
+Serves a copy of a fixed locations.json snapshot from a throwaway data directory,
+using either the Flask/werkzeug development server (what `main.py web` runs via
+app.run) or gunicorn, and drives it with N simulated dashboards. Each client does
+what server_side/app.js does: load the page, its static assets and the binary
+snapshot (data/locations.bin), then poll data/locations.delta for changes since
+it, reloading the page every few polls. The "json" client mode polls the full
+data/locations.json instead, as older dashboards did.
+
+The server always runs in its own process so the client threads don't share its
+GIL. Results (throughput and p50/p95/p99 latency per route and concurrency level)
+are logged and written as JSON.
+
+Run via `main.py loadtest`; `python -m app.loadtest --data-dir D --port P` is the
+builtin server process it starts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import requests
+
+from .config import PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+# Requests a freshly opened dashboard makes against this server (fonts are third-party).
+ASSETS = ["/", "/styles.css?v=3", "/app.js?v=3"]
+
+# Per client mode: the snapshot request on page load, then each poll. {since} is the
+# snapshot's fetchedAt and {viewing} the location shown (see app.js fetchSnapshot).
+CLIENT_MODES = {
+    "delta": (
+        "/data/locations.bin?viewing={viewing}",
+        "/data/locations.delta?since={since}&viewing={viewing}",
+    ),
+    "json": ("/data/locations.json", "/data/locations.json"),
+}
+READY_PATH = "/data/locations.json"
+
+DATA_DIR_ENV = "NWS_LOADTEST_DATA_DIR"
+
+
+def create_app(data_dir: Optional[str] = None):
+    """Server-side app over `data_dir` with no background fetching (also the gunicorn target)."""
+    from flask import Flask
+
+    from .blueprint import create_blueprint
+
+    data_dir = data_dir or os.environ[DATA_DIR_ENV]
+    app = Flask(__name__)
+    app.register_blueprint(
+        create_blueprint(config={
+            "server_side": True,
+            "data_dir": data_dir,
+        }),
+        url_prefix="/",
+    )
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(server: str, data_dir: Path, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, DATA_DIR_ENV: str(data_dir)}
+    if server == "builtin":
+        cmd = [sys.executable, "-m", "app.loadtest", "--data-dir", str(data_dir), "--port", str(port)]
+    elif server == "gunicorn":
+        cmd = [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers),
+            "--threads", "4",
+            "--log-level", "warning",
+            "app.loadtest:create_app()",
+        ]
+    else:
+        raise ValueError(f"unknown server {server!r}; use builtin or gunicorn")
+    return subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env)
+
+
+def _wait_ready(base_url: str, proc: Optional[subprocess.Popen], timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            if requests.get(base_url + READY_PATH, timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} not ready after {timeout:.0f}s")
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = math.ceil(q * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def _route(path: str) -> str:
+    return path.split("?", 1)[0]
+
+
+def _client(
+    base_url: str,
+    stop: threading.Event,
+    samples: Dict[str, List[float]],
+    errors: Dict[str, int],
+    lock: threading.Lock,
+    think_time: float,
+    reload_every: int,
+    page_load: Sequence[str],
+    poll: str,
+) -> None:
+    session = requests.Session()
+    local: Dict[str, List[float]] = {}
+    local_errors: Dict[str, int] = {}
+
+    def get(path: str) -> None:
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + path, timeout=30).ok
+        except requests.RequestException:
+            ok = False
+        route = _route(path)
+        if ok:
+            local.setdefault(route, []).append(time.perf_counter() - start)
+        else:
+            local_errors[route] = local_errors.get(route, 0) + 1
+
+    polls = 0
+    while not stop.is_set():
+        if polls % reload_every == 0:
+            for path in page_load:
+                get(path)
+        else:
+            get(poll)
+        polls += 1
+        if think_time:
+            stop.wait(think_time)
+
+    with lock:
+        for route, values in local.items():
+            samples.setdefault(route, []).extend(values)
+        for route, count in local_errors.items():
+            errors[route] = errors.get(route, 0) + count
+
+
+def _summarize(values: List[float], error_count: int, duration: float) -> Dict:
+    values = sorted(values)
+
+    def ms(v: Optional[float]) -> Optional[float]:
+        return None if v is None else round(v * 1000, 2)
+
+    return {
+        "requests": len(values),
+        "errors": error_count,
+        "rps": round(len(values) / duration, 1),
+        "p50_ms": ms(_percentile(values, 0.50)),
+        "p95_ms": ms(_percentile(values, 0.95)),
+        "p99_ms": ms(_percentile(values, 0.99)),
+    }
+
+
+def client_paths(base_url: str, mode: str) -> Tuple[List[str], str]:
+    """Page-load requests and poll path for client `mode`, filled in from the served snapshot."""
+    snapshot_path, poll = CLIENT_MODES[mode]
+    if mode == "delta":
+        # A delta without `since` is the full snapshot as JSON.
+        snapshot = requests.get(base_url + "/data/locations.delta", timeout=30).json()
+        locations = snapshot.get("locations") or [{}]
+        fields = {
+            "since": quote(snapshot["fetchedAt"], safe=""),
+            "viewing": quote(locations[0].get("name", ""), safe=""),
+        }
+        snapshot_path, poll = snapshot_path.format(**fields), poll.format(**fields)
+    return [*ASSETS, snapshot_path], poll
+
+
+def run_level(
+    base_url: str,
+    clients: int,
+    duration: float,
+    think_time: float,
+    reload_every: int,
+    mode: str = "delta",
+) -> Dict:
+    """Drive `clients` simulated dashboards for `duration` seconds and summarize per route."""
+    page_load, poll = client_paths(base_url, mode)
+    stop = threading.Event()
+    lock = threading.Lock()
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(base_url, stop, samples, errors, lock, think_time, reload_every, page_load, poll),
+            daemon=True,
+        )
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    stop.wait(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    routes = {
+        route: _summarize(samples.get(route, []), errors.get(route, 0), elapsed)
+        for route in sorted(set(samples) | set(errors))
+    }
+    total = _summarize(
+        [v for values in samples.values() for v in values], sum(errors.values()), elapsed
+    )
+    return {"concurrency": clients, "seconds": round(elapsed, 2), "routes": routes, "total": total}
+
+
+def run(
+    snapshot: Path,
+    server: str = "builtin",
+    concurrency: Sequence[int] = (1, 4, 16, 64),
+    duration: float = 15,
+    think_time: float = 0,
+    reload_every: int = 10,
+    workers: int = 4,
+    url: Optional[str] = None,
+    out: Optional[Path] = None,
+    mode: str = "delta",
+) -> Dict:
+    """
+    Load-test the serving path at each concurrency level and return the results.
+
+    `mode` picks the simulated client's requests (see CLIENT_MODES).
+
+    With `url`, an already running server is targeted instead and `snapshot`/`server`
+    are only recorded. Otherwise `snapshot` is copied into a temporary data directory
+    and served by `server` ("builtin" or "gunicorn" with `workers` processes).
+    """
+    data_dir = None
+    proc = None
+    if url is None:
+        data_dir = Path(tempfile.mkdtemp(prefix="nws-loadtest-"))
+        shutil.copyfile(snapshot, data_dir / "locations.json")
+        port = _free_port()
+        proc = _start_server(server, data_dir, port, workers)
+        base_url = f"http://127.0.0.1:{port}"
+    else:
+        base_url = url.rstrip("/")
+
+    try:
+        _wait_ready(base_url, proc)
+        results = {
+            "startedAt": datetime.now(timezone.utc).isoformat(),
+            "server": server if url is None else url,
+            "workers": workers if server == "gunicorn" and url is None else None,
+            "snapshot": str(snapshot),
+            "snapshotBytes": snapshot.stat().st_size if url is None else None,
+            "durationSeconds": duration,
+            "thinkTimeSeconds": think_time,
+            "clientMode": mode,
+            "levels": [],
+        }
+        for clients in concurrency:
+            level = run_level(base_url, clients, duration, think_time, reload_every, mode)
+            results["levels"].append(level)
+            total = level["total"]
+            logger.info(
+                "[LOAD] %d clients: %.1f req/s, p50 %s ms, p95 %s ms, p99 %s ms, %d errors",
+                clients, total["rps"], total["p50_ms"], total["p95_ms"], total["p99_ms"], total["errors"],
+            )
+            for route, stats in level["routes"].items():
+                logger.info(
+                    "[LOAD]   %-22s %8.1f req/s  p50 %7s  p95 %7s  p99 %7s",
+                    route, stats["rps"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"],
+                )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        logger.info("[LOAD] Results written to %s", out)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builtin server process for the load test")
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--port", type=int, required=True)
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    create_app(args.data_dir).run(host="127.0.0.1", port=args.port, threaded=True)
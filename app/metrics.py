@@ -0,0 +1,210 @@
+"""Minimal Prometheus-style metrics for the fetchers and the web tier.
+
+A tiny in-process registry (no prometheus_client dependency) rendering the text
+exposition format at /metrics. Recording is a dict update under a lock, so it is
+cheap enough to sit on every upstream request and every /data/ hit.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, registry: "Registry" = None):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, registry: "Registry" = None):
+        super().__init__(name, help_text, registry)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Last-value gauge, optionally labelled."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, registry: "Registry" = None):
+        super().__init__(name, help_text, registry)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class AgeGauge(Gauge):
+    """Gauge reporting seconds since mark() was last called for each label set."""
+
+    def mark(self, **labels) -> None:
+        self.set(time.time(), **labels)
+
+    def _samples(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(round(now - v, 3))}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, optionally labelled."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: "Registry" = None,
+    ):
+        super().__init__(name, help_text, registry)
+        self._bounds = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self._bounds) + 1), 0.0, 0]
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip((*self._bounds, float("inf")), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Upstream (api.weather.gov and NOMADS) ---
+UPSTREAM_LATENCY = Histogram(
+    "nws_upstream_request_seconds",
+    "Upstream request latency by endpoint type (points/hourly/forecast/grid/filter/listing).",
+)
+UPSTREAM_BYTES = Counter("nws_upstream_bytes_total", "Bytes downloaded from upstream by endpoint type.")
+UPSTREAM_ERRORS = Counter("nws_upstream_errors_total", "Failed upstream requests by endpoint type.")
+UPSTREAM_RETRIES = Counter("nws_upstream_retries_total", "Upstream requests retried or resumed by endpoint type.")
+UPSTREAM_HEDGES = Counter(
+    "nws_upstream_hedged_total", "Duplicate requests sent for slow upstream calls by endpoint type."
+)
+
+# --- Fetch pipeline ---
+LOCATION_LAST_SUCCESS_AGE = AgeGauge(
+    "nws_location_last_success_age_seconds", "Seconds since each location was last fetched successfully."
+)
+FETCH_LOCATION_SECONDS = Histogram("nws_fetch_location_seconds", "Wall time of fetch_location per location.")
+DEADLINE_MISSES = Counter(
+    "nws_deadline_misses_total", "Locations that kept their previous data after missing the fetch deadline."
+)
+SNAPSHOT_WRITE_SECONDS = Histogram("nws_snapshot_write_seconds", "Wall time of write_json_atomic.")
+SNAPSHOT_BYTES = Gauge("nws_snapshot_bytes", "Size of the last snapshot written by write_json_atomic.")
+
+# --- Web tier ---
+HTTP_REQUESTS = Counter("nws_http_requests_total", "Requests served by route and status.")
+HTTP_LATENCY = Histogram("nws_http_request_seconds", "Request handling latency by route.")
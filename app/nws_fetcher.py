@@ -2,13 +2,29 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import re
+import time
+from concurrent.futures import Executor, Future
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import requests
 
+from .deadline import Deadline, DeadlineExceeded, LatencyTracker, thread_session
+from .metrics import (
+    DEADLINE_MISSES,
+    FETCH_LOCATION_SECONDS,
+    LOCATION_LAST_SUCCESS_AGE,
+    UPSTREAM_BYTES,
+    UPSTREAM_ERRORS,
+    UPSTREAM_LATENCY,
+    UPSTREAM_RETRIES,
+)
+from .profiling import location_span, span
+
 logger = logging.getLogger(__name__)
 
 # Color palette for metrics (matches app.js)
@@ -148,6 +164,16 @@ def is_accumulation_metric(key: str) -> bool:
     )
 
 
+def aggregation_for_metric(key: str) -> str:
+    """How to combine hourly values into coarser steps: "sum", "max" or "mean"."""
+    k = key.lower()
+    if is_accumulation_metric(key):
+        return "sum"
+    if "probability" in k or "potentialof" in k or "gust" in k:
+        return "max"
+    return "mean"
+
+
 def get_interval_value(intervals: List[Dict], time_ms: int, per_hour: bool = False) -> Optional[float]:
     """Get value at a specific timestamp from intervals."""
     for entry in intervals:
@@ -335,34 +361,357 @@ def build_daily_forecast(periods: List[Dict]) -> List[Dict]:
     return result
 
 
-def fetch_json(url: str, session: Optional[requests.Session] = None) -> Dict:
-    """Fetch JSON from URL with proper headers."""
-    sess = session or requests.Session()
+# Per-request timeout (lowered further when a deadline is nearer)
+REQUEST_TIMEOUT_SECONDS = 30
+
+# Periods in an api.weather.gov forecastHourly document
+HOURLY_PERIOD_COUNT = 156
+
+# forecastHourly's wording when no weather is forecast: (max sky cover %, day, night)
+SKY_COVER_PHRASES = [
+    (5, "Sunny", "Clear"),
+    (25, "Sunny", "Mostly Clear"),
+    (50, "Mostly Sunny", "Partly Cloudy"),
+    (87, "Partly Sunny", "Mostly Cloudy"),
+    (100, "Cloudy", "Cloudy"),
+]
+
+# Gridpoint weather coverage/intensity codes as forecastHourly words them ("likely" is a suffix)
+WEATHER_COVERAGE = {
+    "slight_chance": "Slight Chance",
+    "chance": "Chance",
+    "likely": "",
+    "definite": "",
+    "isolated": "Isolated",
+    "scattered": "Scattered",
+    "numerous": "Numerous",
+    "areas": "Areas Of",
+    "patchy": "Patchy",
+    "widespread": "Widespread",
+    "occasional": "Occasional",
+    "periods": "Periods Of",
+    "frequent": "Frequent",
+    "brief": "Brief",
+}
+WEATHER_INTENSITY = {"very_light": "Very Light", "light": "Light", "heavy": "Heavy"}
+
+COMPASS_POINTS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+
+
+def parse_layer_intervals(values: List[Dict]) -> List[Tuple[int, int, Any]]:
+    """(start ms, end ms, value) for a gridpoint layer, keeping non-numeric values (e.g. weather)."""
+    result = []
+    for entry in values:
+        valid_time = entry.get("validTime", "")
+        if entry.get("value") is None or "/" not in valid_time:
+            continue
+        start_str, duration_str = valid_time.split("/", 1)
+        try:
+            start_ms = int(datetime.fromisoformat(start_str.replace("Z", "+00:00")).timestamp() * 1000)
+        except (ValueError, TypeError):
+            continue
+        result.append((start_ms, start_ms + parse_duration(duration_str) * 60 * 1000, entry["value"]))
+    return result
+
+
+def _layer_value(intervals: List[Tuple[int, int, Any]], time_ms: int) -> Any:
+    for start, end, value in intervals:
+        if start <= time_ms < end:
+            return value
+    return None
+
+
+def weather_phrase(weather: Optional[List[Dict]]) -> Optional[str]:
+    """forecastHourly-style text ("Chance Light Snow", "Rain Likely") for a gridpoint weather value."""
+    items = [item for item in weather or [] if item.get("weather")]
+    if not items:
+        return None
+    first = items[0]
+    coverage = first.get("coverage")
+    names = [item["weather"].replace("_", " ").title() for item in items[:2]]
+    if len(names) > 1 and items[1].get("coverage") == coverage:
+        # Two weather types with the same coverage read "Rain And Snow", without intensity.
+        words = [WEATHER_COVERAGE.get(coverage, ""), " And ".join(names)]
+    else:
+        words = [WEATHER_COVERAGE.get(coverage, ""), WEATHER_INTENSITY.get(first.get("intensity"), ""), names[0]]
+    if coverage == "likely":
+        words.append("Likely")
+    return " ".join(word for word in words if word)
+
+
+def sky_phrase(sky_cover: Optional[float], is_daytime: bool) -> Optional[str]:
+    """forecastHourly's wording for a sky cover percentage."""
+    if sky_cover is None:
+        return None
+    for limit, day, night in SKY_COVER_PHRASES:
+        if sky_cover <= limit:
+            return day if is_daytime else night
+    return "Cloudy"
+
+
+def compass_direction(degrees: Optional[float]) -> Optional[str]:
+    """8-point compass direction for a wind direction in degrees, as forecastHourly gives it."""
+    if degrees is None:
+        return None
+    return COMPASS_POINTS[int((degrees % 360) / 45 + 0.5) % 8]
+
+
+def hourly_periods_from_grid(
+    grid: Dict, time_zone: Optional[str] = None, now: Optional[datetime] = None
+) -> List[Dict]:
+    """Hourly periods shaped like forecastHourly's, derived from a forecastGridData document.
+
+    The hours run from the current hour (or the grid's first valid hour) for up to
+    HOURLY_PERIOD_COUNT hours within its validTimes, in `time_zone` (the /points
+    timeZone). Periods between 6am and 6pm local are daytime; shortForecast comes
+    from the weather layer, or the sky cover when no weather is forecast;
+    windDirection/windSpeed come from their layers.
+    """
+    props = grid.get("properties", {})
+    start_str, _, duration_str = (props.get("validTimes") or "").partition("/")
+    try:
+        valid_start = datetime.fromisoformat(start_str.replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return []
+    valid_end_ms = int(valid_start.timestamp() * 1000) + parse_duration(duration_str) * 60 * 1000
+    try:
+        tz = ZoneInfo(time_zone) if time_zone else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = timezone.utc
+
+    now = now or datetime.now(timezone.utc)
+    first = max(valid_start, now.replace(minute=0, second=0, microsecond=0))
+    first_ms = int(first.timestamp() * 1000)
+
+    def layer(key: str) -> List[Tuple[int, int, Any]]:
+        return parse_layer_intervals((props.get(key) or {}).get("values") or [])
+
+    weather, sky_cover = layer("weather"), layer("skyCover")
+    wind_direction, wind_speed = layer("windDirection"), layer("windSpeed")
+    _, to_mph = normalize_uom((props.get("windSpeed") or {}).get("uom", ""))
+
+    periods = []
+    for i in range(HOURLY_PERIOD_COUNT):
+        time_ms = first_ms + i * 3600 * 1000
+        if time_ms >= valid_end_ms:
+            break
+        local = datetime.fromtimestamp(time_ms / 1000, tz)
+        is_daytime = 6 <= local.hour < 18
+        speed = sanitize_value(_layer_value(wind_speed, time_ms))
+        periods.append(
+            {
+                "startTime": local.isoformat(),
+                "isDaytime": is_daytime,
+                "shortForecast": weather_phrase(_layer_value(weather, time_ms))
+                or sky_phrase(sanitize_value(_layer_value(sky_cover, time_ms)), is_daytime),
+                "windDirection": compass_direction(sanitize_value(_layer_value(wind_direction, time_ms))),
+                "windSpeed": None if speed is None else f"{int(to_mph(speed) + 0.5)} mph",
+            }
+        )
+    return periods
+
+
+def _get(
+    url: str, sess: requests.Session, endpoint: str, timeout: float, latency: Optional[LatencyTracker] = None
+) -> bytes:
     headers = {"User-Agent": "focused-forecast-demo"}
-    response = sess.get(url, headers=headers, timeout=30)
-    response.raise_for_status()
-    return response.json()
+    start = time.perf_counter()
+    try:
+        response = sess.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException:
+        UPSTREAM_ERRORS.inc(endpoint=endpoint)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+    if latency is not None:
+        latency.record(endpoint, time.perf_counter() - start)
+    UPSTREAM_BYTES.inc(len(response.content), endpoint=endpoint)
+    return response.content
+
+
+def fetch_bytes(
+    url: str,
+    session: Optional[requests.Session] = None,
+    endpoint: str = "other",
+    deadline: Optional[Deadline] = None,
+) -> bytes:
+    """Fetch a JSON document from URL with proper headers, undecoded.
+
+    `endpoint` labels the request in the upstream metrics (points/hourly/forecast/grid).
+    With a `deadline`, the timeout is capped by the time left, a request still
+    running at the deadline raises DeadlineExceeded, and slow requests are hedged
+    (see deadline.Deadline.call). Those requests run on the deadline pool's threads,
+    each with its own session (deadline.thread_session), instead of `session`.
+    """
+    with span(f"request:{endpoint}"):
+        if deadline is None:
+            return _get(url, session or requests.Session(), endpoint, REQUEST_TIMEOUT_SECONDS)
+        return deadline.call(
+            endpoint,
+            lambda timeout: _get(url, thread_session(), endpoint, timeout, deadline.latency),
+            REQUEST_TIMEOUT_SECONDS,
+        )
 
 
-def fetch_location(
-    location: Dict, session: Optional[requests.Session] = None
+def fetch_json(
+    url: str,
+    session: Optional[requests.Session] = None,
+    endpoint: str = "other",
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    """Fetch JSON from URL with proper headers."""
+    content = fetch_bytes(url, session, endpoint, deadline)
+    with span("decode_json"):
+        return json.loads(content)
+
+
+def fetch_point(
+    lat: float, lon: float, session: Optional[requests.Session] = None, deadline: Optional[Deadline] = None
 ) -> Dict:
-    """Fetch all weather data for a single location."""
+    """Fetch /points metadata (grid office, x/y and forecast URLs) for a coordinate."""
+    return fetch_json(f"https://api.weather.gov/points/{lat},{lon}", session, "points", deadline)
+
+
+def resolve_point(
+    lat: float,
+    lon: float,
+    session: Optional[requests.Session] = None,
+    resolver=None,
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    """/points metadata for a coordinate, computed locally by `resolver` (a grids.GridResolver) when it can."""
+    if resolver is not None:
+        point = resolver.resolve(lat, lon)
+        if point is not None:
+            return point
+    point = fetch_point(lat, lon, session, deadline)
+    if resolver is not None:
+        resolver.learn_point(lat, lon, point)
+    return point
+
+
+RawDocument = Union[Dict, bytes, str]
+
+
+def fetch_raw(
+    location: Dict,
+    session: Optional[requests.Session] = None,
+    point: Optional[Dict] = None,
+    resolver=None,
+    hourly_from_grid: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    """Network stage: gather the NWS documents for one location without processing them.
+
+    Returns a raw payload in the example_data/sterling-raw.json layout. The hourly,
+    daily and grid documents are left as undecoded bytes so handing the payload to
+    a worker process pickles three flat buffers rather than large nested dicts.
+    A gridpoint `resolver` computed locally is re-resolved through /points if it
+    turns out not to exist (404) or not to contain the coordinate.
+
+    With `hourly_from_grid`, forecastHourly isn't requested; process_location then
+    derives the hourly periods from the grid data (see hourly_periods_from_grid).
+    All requests share `deadline`, if given.
+    """
     sess = session or requests.Session()
     lat, lon = location["lat"], location["lon"]
 
     # Get point metadata
-    point = fetch_json(f"https://api.weather.gov/points/{lat},{lon}", sess)
+    if point is None:
+        point = resolve_point(lat, lon, sess, resolver, deadline)
+
+    def documents(props: Dict) -> Dict[str, bytes]:
+        docs = {}
+        if not hourly_from_grid:
+            # Get hourly forecast
+            docs["forecastHourly"] = fetch_bytes(props["forecastHourly"], sess, "hourly", deadline)
+        # Get regular forecast (for daily)
+        docs["forecast"] = fetch_bytes(props["forecast"], sess, "forecast", deadline)
+        # Get grid data (detailed metrics)
+        docs["forecastGridData"] = fetch_bytes(props["forecastGridData"], sess, "grid", deadline)
+        return docs
+
+    try:
+        docs = documents(point.get("properties", {}))
+    except requests.HTTPError as e:
+        # A locally resolved gridpoint that doesn't exist: the office grid changed. Ask the API.
+        not_found = e.response is not None and e.response.status_code == 404
+        if resolver is None or not point.get("properties", {}).get("resolvedOffline") or not not_found:
+            raise
+        resolver.forget(lat, lon, point)
+        point = fetch_point(lat, lon, sess, deadline)
+        resolver.learn_point(lat, lon, point)
+        docs = documents(point.get("properties", {}))
+
     props = point.get("properties", {})
+    if resolver is not None and props.get("resolvedOffline"):
+        # A locally resolved gridpoint can also be a neighbouring cell that exists; the
+        # forecast's geometry is the cell, so check the coordinate is in it before using it.
+        cell = (_decoded(docs["forecast"]).get("geometry") or {}).get("coordinates") or [None]
+        gridpoint = {"gridId": props.get("gridId"), "gridX": props.get("gridX"), "gridY": props.get("gridY")}
+        if not resolver.observe(lat, lon, {**gridpoint, "cell": cell[0]}):
+            point = fetch_point(lat, lon, sess, deadline)
+            resolver.learn_point(lat, lon, point)
+            docs = documents(point.get("properties", {}))
+
+    return {
+        "fetchedAt": datetime.now(timezone.utc).isoformat(),
+        "location": {"name": location["name"], "lat": lat, "lon": lon},
+        "point": point,
+        **docs,
+    }
+
 
-    # Get hourly forecast
-    forecast_hourly = fetch_json(props["forecastHourly"], sess)
+def _decoded(document: RawDocument) -> Dict:
+    if isinstance(document, (bytes, str)):
+        with span("decode_json"):
+            return json.loads(document)
+    return document
 
-    # Get regular forecast (for daily)
-    forecast = fetch_json(props["forecast"], sess)
 
-    # Get grid data (detailed metrics)
-    grid = fetch_json(props["forecastGridData"], sess)
+def fetch_location(
+    location: Dict,
+    session: Optional[requests.Session] = None,
+    point: Optional[Dict] = None,
+    resolver=None,
+    hourly_from_grid: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    """Fetch all weather data for a single location.
+
+    Pass an already-fetched /points response as `point` to skip that request, or a
+    grids.GridResolver as `resolver` to skip it whenever the gridpoint can be computed.
+    With `hourly_from_grid`, the forecastHourly request is skipped too. Requests
+    share `deadline`, if given.
+    """
+    start = time.perf_counter()
+    data = process_location(fetch_raw(location, session, point, resolver, hourly_from_grid, deadline))
+    if resolver is not None:
+        resolver.observe(location["lat"], location["lon"], data.get("gridpoint"))
+    FETCH_LOCATION_SECONDS.observe(time.perf_counter() - start)
+    return data
+
+
+def process_location(raw: Dict, now: Optional[datetime] = None) -> Dict:
+    """Processing stage: turn a raw payload (see fetch_raw) into a location entry.
+
+    Pure function of its inputs, so it can run in a worker process or offline on a
+    saved payload. Hours before `now` (default: the current time) are trimmed.
+    Payloads without forecastHourly get hourly periods derived from the grid data.
+    """
+    location = raw["location"]
+    point_props = raw.get("point", {}).get("properties", {})
+    forecast = _decoded(raw["forecast"])
+    grid = _decoded(raw["forecastGridData"])
+    if raw.get("forecastHourly") is not None:
+        forecast_hourly = _decoded(raw["forecastHourly"])
+        hourly_periods = forecast_hourly.get("properties", {}).get("periods", [])
+    else:
+        # Same updateTime and geometry as the hourly document; periods derived from the layers.
+        forecast_hourly = grid
+        with span("hourly_from_grid"):
+            hourly_periods = hourly_periods_from_grid(grid, point_props.get("timeZone"), now)
 
     updated = forecast_hourly.get("properties", {}).get("updateTime")
 
@@ -384,7 +733,8 @@ def fetch_location(
         if not unit and "probability" in key.lower():
             unit = "%"
 
-        intervals = parse_interval_values(prop["values"])
+        with span("parse_intervals"):
+            intervals = parse_interval_values(prop["values"])
         metric_meta.append(
             {
                 "key": key,
@@ -396,123 +746,135 @@ def fetch_location(
         )
 
     # Build hourly data
-    hourly_periods = forecast_hourly.get("properties", {}).get("periods", [])
-    hourly = []
-
-    for period in hourly_periods:
-        start_time = period.get("startTime")
-        if not start_time:
-            continue
-
-        try:
-            time_dt = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-        except (ValueError, TypeError):
-            continue
-
-        time_ms = int(time_dt.timestamp() * 1000)
-        metrics = {}
-
-        for meta in metric_meta:
-            raw = get_interval_value(meta["intervals"], time_ms, is_accumulation_metric(meta["key"]))
-            if raw is None:
-                metrics[meta["key"]] = None
-            else:
-                converted = meta["convert"](raw)
-                metrics[meta["key"]] = sanitize_value(converted)
-
-        hourly.append(
-            {
-                "time": time_dt.isoformat(),
-                "shortForecast": period.get("shortForecast"),
-                "windDirection": period.get("windDirection"),
-                "windSpeedText": period.get("windSpeed"),
-                "metrics": metrics,
-            }
-        )
-
-    # Subtract estimated liquid equivalent of snowfall from quantitative precipitation (10:1 SLR).
-    for entry in hourly:
-        qpf = entry["metrics"].get("quantitativePrecipitation")
-        snow = entry["metrics"].get("snowfallAmount")
-        if qpf is not None and snow is not None:
-            entry["metrics"]["quantitativePrecipitation"] = max(0.0, qpf - snow / 10.0)
+    with span("hourly_assembly"):
+        hourly = []
+
+        for period in hourly_periods:
+            start_time = period.get("startTime")
+            if not start_time:
+                continue
+
+            try:
+                time_dt = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
+            except (ValueError, TypeError):
+                continue
+
+            time_ms = int(time_dt.timestamp() * 1000)
+            metrics = {}
+
+            for meta in metric_meta:
+                raw = get_interval_value(meta["intervals"], time_ms, is_accumulation_metric(meta["key"]))
+                if raw is None:
+                    metrics[meta["key"]] = None
+                else:
+                    converted = meta["convert"](raw)
+                    metrics[meta["key"]] = sanitize_value(converted)
+
+            hourly.append(
+                {
+                    "time": time_dt.isoformat(),
+                    "shortForecast": period.get("shortForecast"),
+                    "windDirection": period.get("windDirection"),
+                    "windSpeedText": period.get("windSpeed"),
+                    "metrics": metrics,
+                }
+            )
 
-    # Trim past hours
-    now = datetime.now(timezone.utc)
-    current_hour = now.replace(minute=0, second=0, microsecond=0)
-
-    if hourly:
-        first_time = datetime.fromisoformat(hourly[0]["time"])
-        if current_hour > first_time:
-            hourly = [
-                entry
-                for entry in hourly
-                if datetime.fromisoformat(entry["time"]) >= current_hour
-            ]
+        # Subtract estimated liquid equivalent of snowfall from quantitative precipitation (10:1 SLR).
+        for entry in hourly:
+            qpf = entry["metrics"].get("quantitativePrecipitation")
+            snow = entry["metrics"].get("snowfallAmount")
+            if qpf is not None and snow is not None:
+                entry["metrics"]["quantitativePrecipitation"] = max(0.0, qpf - snow / 10.0)
+
+        # Trim past hours
+        now = now or datetime.now(timezone.utc)
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+
+        if hourly:
+            first_time = datetime.fromisoformat(hourly[0]["time"])
+            if current_hour > first_time:
+                hourly = [
+                    entry
+                    for entry in hourly
+                    if datetime.fromisoformat(entry["time"]) >= current_hour
+                ]
 
     # Filter metrics that have data
-    filtered_meta = [
-        meta
-        for meta in metric_meta
-        if any(
-            entry["metrics"].get(meta["key"]) is not None
-            for entry in hourly
-        )
-        and not (
-            meta["key"].lower() == "waveheight"
-            and all(
-                entry["metrics"].get(meta["key"]) in (None, 0, 0.0)
+    with span("filter_metrics"):
+        filtered_meta = [
+            meta
+            for meta in metric_meta
+            if any(
+                entry["metrics"].get(meta["key"]) is not None
                 for entry in hourly
             )
-        )
-    ]
+            and not (
+                meta["key"].lower() == "waveheight"
+                and all(
+                    entry["metrics"].get(meta["key"]) in (None, 0, 0.0)
+                    for entry in hourly
+                )
+            )
+        ]
 
-    # Sort and build final metrics list
-    filtered_meta.sort(key=lambda m: m["label"])
-    metrics = []
-    for i, meta in enumerate(filtered_meta):
-        metrics.append(
-            {
-                "key": meta["key"],
-                "label": meta["label"],
-                "unit": meta["unit"],
-                "color": get_metric_color(meta["key"]),
-            }
-        )
+        # Sort and build final metrics list
+        filtered_meta.sort(key=lambda m: m["label"])
+        metrics = []
+        for i, meta in enumerate(filtered_meta):
+            metrics.append(
+                {
+                    "key": meta["key"],
+                    "label": meta["label"],
+                    "unit": meta["unit"],
+                    "color": get_metric_color(meta["key"]),
+                }
+            )
 
     # Calculate extents
-    metric_extents = {}
-    group_extents = {}
-
-    for metric in metrics:
-        values = [
-            entry["metrics"].get(metric["key"])
-            for entry in hourly
-            if entry["metrics"].get(metric["key"]) is not None
-        ]
-        if not values:
-            continue
+    with span("extents"):
+        metric_extents = {}
+        group_extents = {}
 
-        min_val = min(values)
-        max_val = max(values)
-        metric_extents[metric["key"]] = {"min": min_val, "max": max_val}
+        for metric in metrics:
+            values = [
+                entry["metrics"].get(metric["key"])
+                for entry in hourly
+                if entry["metrics"].get(metric["key"]) is not None
+            ]
+            if not values:
+                continue
 
-        group = get_group_for_metric(metric)
-        group_key = f"{group['id']}|{metric.get('unit') or 'unitless'}"
+            min_val = min(values)
+            max_val = max(values)
+            metric_extents[metric["key"]] = {"min": min_val, "max": max_val}
 
-        if group_key not in group_extents:
-            group_extents[group_key] = {"min": min_val, "max": max_val}
-        else:
-            group_extents[group_key]["min"] = min(
-                group_extents[group_key]["min"], min_val
-            )
-            group_extents[group_key]["max"] = max(
-                group_extents[group_key]["max"], max_val
-            )
+            group = get_group_for_metric(metric)
+            group_key = f"{group['id']}|{metric.get('unit') or 'unitless'}"
+
+            if group_key not in group_extents:
+                group_extents[group_key] = {"min": min_val, "max": max_val}
+            else:
+                group_extents[group_key]["min"] = min(
+                    group_extents[group_key]["min"], min_val
+                )
+                group_extents[group_key]["max"] = max(
+                    group_extents[group_key]["max"], max_val
+                )
 
     # Build daily forecast
-    daily_periods = forecast.get("properties", {}).get("periods", [])
-    daily_forecast = build_daily_forecast(daily_periods)
+    with span("daily_forecast"):
+        daily_periods = forecast.get("properties", {}).get("periods", [])
+        daily_forecast = build_daily_forecast(daily_periods)
+
+    # The forecast's geometry is the gridpoint cell the coordinate resolved to.
+    cell = (forecast_hourly.get("geometry") or {}).get("coordinates") or [None]
+    gridpoint = {
+        "gridId": point_props.get("gridId"),
+        "gridX": point_props.get("gridX"),
+        "gridY": point_props.get("gridY"),
+        "cell": cell[0],
+    }
 
     return {
         "name": location["name"],
@@ -524,41 +886,258 @@ def fetch_location(
         "metricExtents": metric_extents,
         "groupExtents": group_extents,
         "dailyForecast": daily_forecast,
+        "gridpoint": gridpoint,
     }
 
 
+def _failed_location(location: Dict, error: Exception, previous: Optional[Dict]) -> Dict:
+    """Entry for a location whose fetch failed: last good data marked stale, or an empty error entry."""
+    if isinstance(error, DeadlineExceeded):
+        DEADLINE_MISSES.inc(location=location["name"])
+    now = datetime.now(timezone.utc)
+    if previous and previous.get("lastSuccess") and previous.get("hourly"):
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        last_success = datetime.fromisoformat(previous["lastSuccess"])
+        return {
+            **previous,
+            "hourly": [
+                entry
+                for entry in previous["hourly"]
+                if datetime.fromisoformat(entry["time"]) >= current_hour
+            ],
+            "error": str(error),
+            "stale": True,
+            "ageSeconds": int((now - last_success).total_seconds()),
+        }
+
+    return {
+        "name": location["name"],
+        "lat": location["lat"],
+        "lon": location["lon"],
+        "error": str(error),
+        "hourly": [],
+        "metrics": [],
+        "metricExtents": {},
+        "groupExtents": {},
+        "dailyForecast": [],
+    }
+
+
+def _succeeded(location: Dict, data: Dict) -> Dict:
+    data["lastSuccess"] = datetime.now(timezone.utc).isoformat()
+    LOCATION_LAST_SUCCESS_AGE.mark(location=location["name"])
+    return data
+
+
+def _fetch_or_fallback(
+    location: Dict,
+    session: requests.Session,
+    previous: Optional[Dict],
+    resolver=None,
+    hourly_from_grid: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    try:
+        with location_span(location["name"]):
+            data = fetch_location(
+                location, session, resolver=resolver, hourly_from_grid=hourly_from_grid, deadline=deadline
+            )
+    except Exception as e:
+        logger.error("Error fetching %s: %s", location["name"], e)
+        return _failed_location(location, e, previous)
+    return _succeeded(location, data)
+
+
+def _process_timed(raw: Dict) -> Tuple[Dict, float]:
+    start = time.perf_counter()
+    data = process_location(raw)
+    return data, time.perf_counter() - start
+
+
+def _fetch_all_pooled(
+    locations: List[Dict],
+    session: requests.Session,
+    prior: Dict[str, Dict],
+    pool: Executor,
+    resolver=None,
+    hourly_from_grid: bool = False,
+    deadline: Optional[Deadline] = None,
+    location_budget: Optional[float] = None,
+) -> List[Dict]:
+    """Fetch raw payloads on this thread while `pool` processes the ones already fetched."""
+    deadline = deadline or Deadline()
+    pending: List[Tuple[Dict, Optional[Future], float, Optional[Exception]]] = []
+    for location in locations:
+        start = time.perf_counter()
+        try:
+            with location_span(location["name"]):
+                raw = fetch_raw(
+                    location, session, resolver=resolver, hourly_from_grid=hourly_from_grid,
+                    deadline=deadline.child(location_budget),
+                )
+        except Exception as e:
+            pending.append((location, None, 0.0, e))
+            continue
+        pending.append((location, pool.submit(_process_timed, raw), time.perf_counter() - start, None))
+
+    results = []
+    for location, future, network_seconds, error in pending:
+        if future is not None:
+            try:
+                data, process_seconds = future.result()
+            except Exception as e:
+                error = e
+            else:
+                FETCH_LOCATION_SECONDS.observe(network_seconds + process_seconds)
+                if resolver is not None:
+                    resolver.observe(location["lat"], location["lon"], data.get("gridpoint"))
+                results.append(_succeeded(location, data))
+                continue
+        logger.error("Error fetching %s: %s", location["name"], error)
+        results.append(_failed_location(location, error, prior.get(location["name"])))
+    return results
+
+
 def fetch_all_locations(
-    locations: List[Dict], session: Optional[requests.Session] = None
+    locations: List[Dict],
+    session: Optional[requests.Session] = None,
+    previous: Optional[Dict] = None,
+    pool: Optional[Executor] = None,
+    resolver=None,
+    hourly_from_grid: bool = False,
+    budget: Optional[float] = None,
+    location_budget: Optional[float] = None,
+    latency: Optional[LatencyTracker] = None,
 ) -> Dict:
-    """Fetch weather data for all locations."""
+    """Fetch weather data for all locations.
+
+    With the `previous` snapshot, a location that fails keeps its last good data,
+    flagged "stale" with its "error" and "ageSeconds" since "lastSuccess".
+
+    With a `pool` (e.g. a ProcessPoolExecutor), only the network stage runs on this
+    thread; process_location runs in the pool, overlapping later downloads.
+
+    With a grids.GridResolver as `resolver`, /points requests are skipped for
+    coordinates it can resolve locally. With `hourly_from_grid`, forecastHourly
+    requests are skipped and the hourly periods derived from the grid data.
+
+    The cycle's requests must finish within `budget` seconds, and each location's
+    within `location_budget` of that; locations that miss it keep their previous
+    data (flagged stale) like failed ones. With a deadline.LatencyTracker as
+    `latency`, requests slower than its percentile for their endpoint are hedged.
+    """
     sess = session or requests.Session()
     fetched_at = datetime.now(timezone.utc).isoformat()
+    prior = {loc["name"]: loc for loc in (previous or {}).get("locations", [])}
+    deadline = Deadline(budget, latency)
 
-    results = []
-    for location in locations:
-        try:
-            data = fetch_location(location, sess)
-            results.append(data)
-        except Exception as e:
-            logger.error("Error fetching %s: %s", location["name"], e)
-            # Include location with error flag
-            results.append(
-                {
-                    "name": location["name"],
-                    "lat": location["lat"],
-                    "lon": location["lon"],
-                    "error": str(e),
-                    "hourly": [],
-                    "metrics": [],
-                    "metricExtents": {},
-                    "groupExtents": {},
-                    "dailyForecast": [],
-                }
+    if pool is not None:
+        results = _fetch_all_pooled(
+            locations, sess, prior, pool, resolver, hourly_from_grid, deadline, location_budget
+        )
+    else:
+        results = [
+            _fetch_or_fallback(
+                location, sess, prior.get(location["name"]), resolver, hourly_from_grid,
+                deadline.child(location_budget),
             )
+            for location in locations
+        ]
 
     return {"fetchedAt": fetched_at, "locations": results}
 
 
+def process_saved(raws: List[Dict], pool: Optional[Executor] = None) -> List[Dict]:
+    """Offline processing stage: run process_location over saved raw payloads.
+
+    Each payload's hours are trimmed relative to its own "fetchedAt" rather than the
+    current time, so old captures such as example_data/sterling-raw.json still yield
+    their full forecast.
+    """
+    def now_of(raw: Dict) -> Optional[datetime]:
+        return datetime.fromisoformat(raw["fetchedAt"]) if raw.get("fetchedAt") else None
+
+    if pool is None:
+        return [process_location(raw, now_of(raw)) for raw in raws]
+    return list(pool.map(process_location, raws, [now_of(raw) for raw in raws]))
+
+
+def hourly_parity(raw: Dict, now: Optional[datetime] = None) -> Dict:
+    """Compare a saved payload's hourly entries with those derived from its grid data alone.
+
+    Processes `raw` as fetched and again without forecastHourly (trimming at its
+    "fetchedAt" unless `now` is given) and reports, over the hours both have, the
+    entries whose shortForecast/windDirection/windSpeedText/metrics differ, plus the
+    hours only one of them has.
+    """
+    if now is None and raw.get("fetchedAt"):
+        now = datetime.fromisoformat(raw["fetchedAt"].replace("Z", "+00:00"))
+    expected = {entry["time"]: entry for entry in process_location(raw, now)["hourly"]}
+    derived = {
+        entry["time"]: entry
+        for entry in process_location({**raw, "forecastHourly": None}, now)["hourly"]
+    }
+
+    fields = ("shortForecast", "windDirection", "windSpeedText", "metrics")
+    common = [t for t in expected if t in derived]
+    mismatches: Dict[str, List] = {field: [] for field in fields}
+    for t in common:
+        for field in fields:
+            if expected[t][field] != derived[t][field]:
+                mismatches[field].append([t, expected[t][field], derived[t][field]])
+    return {
+        "hours": len(common),
+        "onlyHourly": [t for t in expected if t not in derived],
+        "onlyGrid": [t for t in derived if t not in expected],
+        "mismatches": {field: rows for field, rows in mismatches.items() if rows},
+    }
+
+
+def failed_locations(snapshot: Dict, locations: List[Dict]) -> List[Dict]:
+    """Configured locations whose entry in `snapshot` is an error (stale or empty)."""
+    failed = {loc["name"] for loc in snapshot.get("locations", []) if loc.get("error")}
+    return [location for location in locations if location["name"] in failed]
+
+
+def refresh_locations(
+    snapshot: Dict,
+    locations: List[Dict],
+    session: Optional[requests.Session] = None,
+    resolver=None,
+    hourly_from_grid: bool = False,
+    budget: Optional[float] = None,
+    location_budget: Optional[float] = None,
+    latency: Optional[LatencyTracker] = None,
+) -> Dict:
+    """Refetch only `locations` and splice them into a copy of `snapshot` (new fetchedAt).
+
+    Locations not yet in `snapshot` are appended. `budget`, `location_budget` and
+    `latency` work as in fetch_all_locations.
+    """
+    sess = session or requests.Session()
+    prior = {loc["name"]: loc for loc in snapshot.get("locations", [])}
+    order = [loc["name"] for loc in snapshot.get("locations", [])]
+    order += [location["name"] for location in locations if location["name"] not in prior]
+    deadline = Deadline(budget, latency)
+    for location in locations:
+        prior[location["name"]] = _fetch_or_fallback(
+            location, sess, prior.get(location["name"]), resolver, hourly_from_grid,
+            deadline.child(location_budget),
+        )
+    return {
+        "fetchedAt": datetime.now(timezone.utc).isoformat(),
+        "locations": [prior[name] for name in order],
+    }
+
+
+def retry_locations(
+    snapshot: Dict, locations: List[Dict], session: Optional[requests.Session] = None, **kwargs
+) -> Dict:
+    """refresh_locations for locations that failed (counted as retries)."""
+    UPSTREAM_RETRIES.inc(len(locations), endpoint="location")
+    return refresh_locations(snapshot, locations, session, **kwargs)
+
+
 if __name__ == "__main__":
     # Quick test
     from app.config import LOCATIONS
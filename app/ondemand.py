@@ -0,0 +1,81 @@
+"""On-demand forecasts for arbitrary coordinates (/api/point)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from .caching import SingleFlight, TTLCache
+from .nws_fetcher import fetch_location, resolve_point
+
+# Coordinate -> gridpoint mappings only change when NWS redraws office grids.
+POINT_MAPPING_TTL_SECONDS = 24 * 3600
+
+GridKey = Tuple[str, int, int]
+
+
+class PointForecaster:
+    """
+    Resolve lat/lon to an NWS gridpoint and return its processed forecast.
+
+    Many coordinates share a 2.5 km gridpoint, so results are cached per gridpoint
+    (bounded LRU, `ttl` seconds) and concurrent lookups for the same gridpoint share
+    one upstream fetch. /points responses are cached per rounded coordinate, and
+    with a grids.GridResolver most new coordinates skip /points altogether. With
+    `hourly_from_grid`, forecastHourly is skipped (see nws_fetcher.hourly_periods_from_grid).
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 1800, resolver=None, hourly_from_grid: bool = False):
+        self.points: TTLCache[Dict] = TTLCache(max_entries * 4, POINT_MAPPING_TTL_SECONDS)
+        self.results: TTLCache[Dict] = TTLCache(max_entries, ttl)
+        self.resolver = resolver
+        self.hourly_from_grid = hourly_from_grid
+        self._flights = SingleFlight()
+
+    def _point(self, lat: float, lon: float) -> Dict:
+        key = (lat, lon)
+        point = self.points.get(key)
+        if point is None:
+            point = self._flights.do(("points", key), lambda: resolve_point(lat, lon, resolver=self.resolver))
+            self.points.set(key, point)
+        return point
+
+    def forecast(self, lat: float, lon: float) -> Dict:
+        # /points itself resolves at 4 decimal places (~10 m).
+        lat, lon = round(lat, 4), round(lon, 4)
+        point = self._point(lat, lon)
+        props = point.get("properties", {})
+        grid: GridKey = (props.get("gridId"), props.get("gridX"), props.get("gridY"))
+
+        cached = self.results.get(grid)
+        if cached is not None:
+            return cached
+
+        def load() -> Dict:
+            location = {"name": f"{lat},{lon}", "lat": lat, "lon": lon}
+            data = fetch_location(
+                location, requests.Session(), point=point, resolver=self.resolver,
+                hourly_from_grid=self.hourly_from_grid,
+            )
+            data["fetchedAt"] = datetime.now(timezone.utc).isoformat()
+            gridpoint = data.get("gridpoint") or {}
+            fetched: GridKey = (gridpoint.get("gridId"), gridpoint.get("gridX"), gridpoint.get("gridY"))
+            if fetched != grid:
+                # The cached point was a wrong local resolution; fetch_location re-resolved it.
+                self.points.delete((lat, lon))
+            self.results.set(fetched, data)
+            return data
+
+        return self._flights.do(("grid", grid), load)
+
+
+def parse_coordinate(lat: Optional[str], lon: Optional[str]) -> Tuple[float, float]:
+    """Validate lat/lon query parameters, raising ValueError on bad input."""
+    if lat is None or lon is None:
+        raise ValueError("lat and lon are required")
+    lat_f, lon_f = float(lat), float(lon)
+    if not (-90 <= lat_f <= 90 and -180 <= lon_f <= 180):
+        raise ValueError("lat/lon out of range")
+    return lat_f, lon_f
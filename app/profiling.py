@@ -0,0 +1,120 @@
+"""Per-stage timing spans and an opt-in cProfile hook for fetch cycles.
+
+A cycle (one NWS refresh or one HRRR sync) runs inside `trace(kind)`. Code on that
+thread marks stages with `span(name)`; outside a trace a span is a no-op, so the
+fetchers can be instrumented unconditionally. Finished traces are logged and kept
+in a ring buffer served by the /debug/timings route.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RECENT_TRACES: Deque[Dict] = deque(maxlen=50)
+_recent_lock = threading.Lock()
+_local = threading.local()
+
+
+class Trace:
+    """Accumulated stage timings for one fetch cycle."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.locations: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "count": 0})
+        stage["seconds"] += seconds
+        stage["count"] += 1
+
+    def record(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "started": self.started.isoformat(),
+            "totalSeconds": round(time.perf_counter() - self._start, 4),
+            "stages": {
+                name: {"seconds": round(v["seconds"], 4), "count": int(v["count"])}
+                for name, v in sorted(self.stages.items(), key=lambda kv: -kv[1]["seconds"])
+            },
+            "locations": {name: round(v, 4) for name, v in self.locations.items()},
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the active trace (no-op when no trace is active)."""
+    active = current_trace()
+    if active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.add(name, time.perf_counter() - start)
+
+
+@contextmanager
+def location_span(name: str) -> Iterator[None]:
+    """Time all work for one location of the active trace."""
+    active = current_trace()
+    if active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.locations[name] = active.locations.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def trace(kind: str, profile_path: Optional[str] = None) -> Iterator[Trace]:
+    """Collect spans for one cycle; optionally run it under cProfile and dump stats."""
+    active = Trace(kind)
+    _local.trace = active
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield active
+    finally:
+        if profiler:
+            profiler.disable()
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_path)
+            logger.info("[%s] Wrote cycle profile to %s", kind.upper(), profile_path)
+        _local.trace = None
+        record = active.record()
+        with _recent_lock:
+            RECENT_TRACES.append(record)
+        logger.info(
+            "[%s] Cycle timings: total=%.2fs %s",
+            kind.upper(),
+            record["totalSeconds"],
+            " ".join(f"{name}={v['seconds']:.2f}s" for name, v in record["stages"].items()),
+        )
+
+
+def recent_traces(kind: Optional[str] = None) -> List[Dict]:
+    """Newest-first copy of the ring buffer, optionally filtered by kind."""
+    with _recent_lock:
+        records = list(RECENT_TRACES)
+    return [r for r in reversed(records) if kind is None or r["kind"] == kind]
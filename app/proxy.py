@@ -0,0 +1,160 @@
+"""Shared caching proxy for api.weather.gov (client-only mode's /proxy/nws/...).
+
+Browsers in client-only mode fetch the NWS API themselves; routing them through
+this proxy makes N open dashboards cost one upstream request per resource per
+freshness lifetime. Freshness comes from the upstream Cache-Control header
+(max-age / s-maxage; no-store and no-cache responses aren't reused), concurrent
+misses for the same URL share one upstream request, and the in-memory cache is an
+LRU bounded by entry count and total body bytes. With `disk_dir`, responses are also written there so they survive
+restarts and entries evicted from memory can still be served while fresh.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import requests
+
+from .caching import SingleFlight, TTLCache
+from .deadline import thread_session
+from .metrics import UPSTREAM_BYTES, UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+NWS_API = "https://api.weather.gov/"
+
+# Responses larger than this are passed through but never cached (gridpoint documents are ~300 KB).
+MAX_CACHED_BODY_BYTES = 4 * 1024 * 1024
+
+_PASSED_HEADERS = ("Content-Type", "Cache-Control", "Last-Modified", "Expires")
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    expires: float  # wall-clock epoch seconds
+
+
+def freshness_seconds(cache_control: Optional[str], default: float) -> float:
+    """Seconds a response may be reused for, per its Cache-Control header (0 = don't reuse)."""
+    if not cache_control:
+        return default
+    directives = {}
+    for part in cache_control.split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if re.fullmatch(r"\d+", directives.get(name, "")):
+            return float(directives[name])
+    return default
+
+
+class NWSProxy:
+    """Forward GETs to api.weather.gov through a shared, Cache-Control-aware cache."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        disk_dir: Optional[str | Path] = None,
+        default_ttl: float = 60,
+        timeout: float = 30,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        # Per-entry TTLs are set from each response; the cache's own TTL is only an upper bound.
+        self.memory: TTLCache[CachedResponse] = TTLCache(
+            max_entries, 24 * 3600, max_bytes=max_bytes, sizeof=lambda entry: len(entry.body)
+        )
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.timeout = timeout
+        self._flights = SingleFlight()
+
+    def _disk_paths(self, url: str):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{digest}.json", self.disk_dir / f"{digest}.body"
+
+    def _read_disk(self, url: str) -> Optional[CachedResponse]:
+        if not self.disk_dir:
+            return None
+        meta_path, body_path = self._disk_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["url"] != url or meta["expires"] <= time.time():
+                return None
+            body = body_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        return CachedResponse(meta["status"], meta["headers"], body, meta["expires"])
+
+    def _write_disk(self, url: str, entry: CachedResponse) -> None:
+        if not self.disk_dir:
+            return
+        meta_path, body_path = self._disk_paths(url)
+        try:
+            # Body first, then the metadata that makes it visible, each via rename.
+            for path, data in (
+                (body_path, entry.body),
+                (meta_path, json.dumps({
+                    "url": url, "status": entry.status, "headers": entry.headers, "expires": entry.expires,
+                }).encode("utf-8")),
+            ):
+                fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("[NWS] Proxy disk cache write failed: %s", e)
+
+    def _fetch(self, url: str) -> CachedResponse:
+        start = time.perf_counter()
+        try:
+            # requests.Session isn't thread-safe; each Flask request thread uses its own.
+            response = thread_session().get(
+                url,
+                headers={"User-Agent": "focused-forecast-demo", "Accept": "application/geo+json"},
+                timeout=self.timeout,
+            )
+        except requests.RequestException:
+            UPSTREAM_ERRORS.inc(endpoint="proxy")
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint="proxy")
+        UPSTREAM_BYTES.inc(len(response.content), endpoint="proxy")
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(endpoint="proxy")
+
+        headers = {name: response.headers[name] for name in _PASSED_HEADERS if name in response.headers}
+        ttl = 0.0
+        if response.status_code == 200 and len(response.content) <= MAX_CACHED_BODY_BYTES:
+            ttl = freshness_seconds(response.headers.get("Cache-Control"), self.default_ttl)
+        entry = CachedResponse(response.status_code, headers, response.content, time.time() + ttl)
+        if ttl > 0:
+            self.memory.set(url, entry, ttl=ttl)
+            self._write_disk(url, entry)
+        return entry
+
+    def get(self, path: str, query: str = "") -> Tuple[CachedResponse, str]:
+        """Response for api.weather.gov/`path`?`query` and how it was served (hit/disk/miss)."""
+        url = NWS_API + path.lstrip("/") + (f"?{query}" if query else "")
+        entry = self.memory.get(url)
+        if entry is not None:
+            return entry, "hit"
+        entry = self._read_disk(url)
+        if entry is not None:
+            self.memory.set(url, entry, ttl=entry.expires - time.time())
+            return entry, "disk"
+        return self._flights.do(url, lambda: self._fetch(url)), "miss"
@@ -0,0 +1,161 @@
+"""JSON serializers for locations.json snapshots, and a streaming snapshot writer.
+
+Two backends share one interface (`dumps` to bytes, `loads` from bytes/str):
+
+- "orjson": the orjson extension, several times faster than the stdlib encoder
+  (optional; install `orjson`)
+- "json": the stdlib encoder with compact separators
+
+`get_serializer("auto")` picks orjson when it is importable. Output is compact
+(no indentation). Floats can be rounded to a fixed number of decimal places
+first; metric values carry far more digits than the dashboard shows.
+
+`stream_snapshot` writes a snapshot location by location, so the encoded file is
+never held in memory as one string; callers still write into a temp file and
+os.replace it (see background.write_json_atomic).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import IO, Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+_CONTAINERS = (dict, list)
+
+
+class Serializer:
+    """Encode/decode JSON documents as UTF-8 bytes."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+
+def available_serializers() -> List[str]:
+    """Backend names usable in this environment, fastest first."""
+    return (["orjson"] if orjson is not None else []) + ["json"]
+
+
+def get_serializer(name: str = "auto") -> Serializer:
+    """Serializer backend by name ("auto" = fastest available)."""
+    if name == "auto":
+        name = available_serializers()[0]
+    if name == "orjson":
+        if orjson is None:
+            raise ValueError("orjson serializer requested but orjson is not installed")
+        return OrjsonSerializer()
+    if name == "json":
+        return Serializer()
+    raise ValueError(f"unknown serializer {name!r}; use auto, orjson or json")
+
+
+def round_floats(obj: Any, digits: Optional[int]) -> Any:
+    """Copy of `obj` with every float rounded to `digits` decimal places (None = unchanged)."""
+    if digits is None:
+        return obj
+    kind = type(obj)
+    if kind is float:
+        return round(obj, digits)
+    if kind is dict:
+        # Inline the common scalar cases; snapshots are mostly dicts of floats/None.
+        return {
+            k: round(v, digits) if type(v) is float else v if type(v) not in _CONTAINERS else round_floats(v, digits)
+            for k, v in obj.items()
+        }
+    if kind is list:
+        return [
+            round(v, digits) if type(v) is float else v if type(v) not in _CONTAINERS else round_floats(v, digits)
+            for v in obj
+        ]
+    return obj
+
+
+def stream_snapshot(
+    snapshot: Dict,
+    f: IO[bytes],
+    serializer: Optional[Serializer] = None,
+    float_digits: Optional[int] = None,
+) -> int:
+    """Write `snapshot` to binary file `f` one location at a time; returns bytes written."""
+    serializer = serializer or get_serializer()
+    written = 0
+
+    def write(chunk: bytes) -> None:
+        nonlocal written
+        f.write(chunk)
+        written += len(chunk)
+
+    write(b"{")
+    for key, value in snapshot.items():
+        if key != "locations":
+            write(serializer.dumps(key) + b":" + serializer.dumps(round_floats(value, float_digits)) + b",")
+    write(b'"locations":[')
+    for i, loc in enumerate(snapshot.get("locations", [])):
+        write((b"," if i else b"") + serializer.dumps(round_floats(loc, float_digits)))
+    write(b"]}")
+    return written
+
+
+class _Counter:
+    """Write sink that only counts bytes (benchmarks exclude disk I/O)."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+
+
+def benchmark(snapshot: Dict, repeat: int = 5, float_digits: Optional[int] = None) -> List[Dict]:
+    """
+    Time encoding `snapshot` with the current (json.dump indent=2) format and each
+    backend via stream_snapshot; best of `repeat` runs, plus output size.
+    """
+
+    def best(fn) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    baseline_bytes = len(json.dumps(snapshot, indent=2).encode("utf-8"))
+    baseline = best(lambda: json.dumps(snapshot, indent=2).encode("utf-8"))
+    results = [{"format": "json indent=2 (baseline)", "seconds": baseline, "bytes": baseline_bytes}]
+    for name in available_serializers():
+        serializer = get_serializer(name)
+        for digits in dict.fromkeys([None, float_digits]):
+            sink = _Counter()
+            stream_snapshot(snapshot, sink, serializer, digits)
+            label = f"{name} streamed" + ("" if digits is None else f", {digits} decimals")
+            results.append({
+                "format": label,
+                "seconds": best(lambda: stream_snapshot(snapshot, _Counter(), serializer, digits)),
+                "bytes": sink.size,
+            })
+    for result in results:
+        result["speedup"] = round(baseline / result["seconds"], 2) if result["seconds"] else None
+        result["sizeRatio"] = round(result["bytes"] / baseline_bytes, 3)
+    return results
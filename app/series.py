@@ -0,0 +1,206 @@
+"""Windowing, aggregation and downsampling of a location's hourly series."""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from .nws_fetcher import aggregation_for_metric, is_accumulation_metric
+
+HOUR_MS = 3600 * 1000
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp; naive values are taken as UTC."""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def parse_step(value: Optional[str]) -> int:
+    """Parse a step like "1h", "3h", "1d" or a bare number of hours into whole hours."""
+    if not value:
+        return 1
+    match = re.fullmatch(r"\s*(\d+)\s*([hd]?)\s*", value.lower())
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"invalid step {value!r}; use e.g. 1h, 3h, 1d")
+    hours = int(match.group(1))
+    return hours * 24 if match.group(2) == "d" else hours
+
+
+def find_location(snapshot: Dict, name: str) -> Optional[Dict]:
+    """Look up a snapshot location by (case-insensitive) name or list index."""
+    locations = snapshot.get("locations", [])
+    wanted = name.strip().lower()
+    for loc in locations:
+        if loc["name"].lower() == wanted:
+            return loc
+    if wanted.isdigit() and int(wanted) < len(locations):
+        return locations[int(wanted)]
+    return None
+
+
+def _aggregate(values: List[float], how: str) -> float:
+    if how == "sum":
+        return sum(values)
+    if how == "max":
+        return max(values)
+    return sum(values) / len(values)
+
+
+def window_series(
+    location: Dict,
+    metrics: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    step_hours: int = 1,
+) -> Dict:
+    """
+    Columnar slice of a location's hourly data.
+
+    Keeps hours in [start, end) for the requested metric keys (default: all). With
+    step_hours > 1 the hours are bucketed on UTC multiples of the step and each metric
+    is combined per aggregation_for_metric (sum for accumulations, max for
+    probabilities/gusts, mean otherwise); buckets with no data are None.
+    """
+    meta = [m for m in location.get("metrics", []) if metrics is None or m["key"] in metrics]
+    start_ms = int(start.timestamp() * 1000) if start else None
+    end_ms = int(end.timestamp() * 1000) if end else None
+
+    rows = []
+    for entry in location.get("hourly", []):
+        t_ms = int(parse_time(entry["time"]).timestamp() * 1000)
+        if start_ms is not None and t_ms < start_ms:
+            continue
+        if end_ms is not None and t_ms >= end_ms:
+            continue
+        rows.append((t_ms, entry))
+
+    step_ms = step_hours * HOUR_MS
+    buckets: Dict[int, List[Dict]] = {}
+    for t_ms, entry in rows:
+        buckets.setdefault(t_ms - t_ms % step_ms, []).append(entry)
+
+    times = []
+    series: Dict[str, List[Optional[float]]] = {m["key"]: [] for m in meta}
+    for bucket_ms, entries in buckets.items():
+        times.append(datetime.fromtimestamp(bucket_ms / 1000, tz=timezone.utc).isoformat())
+        for m in meta:
+            values = [e["metrics"].get(m["key"]) for e in entries]
+            values = [v for v in values if v is not None]
+            if not values:
+                series[m["key"]].append(None)
+            elif step_hours == 1:
+                series[m["key"]].append(values[0])
+            else:
+                series[m["key"]].append(_aggregate(values, aggregation_for_metric(m["key"])))
+
+    return {
+        "name": location["name"],
+        "updated": location.get("updated"),
+        "stepHours": step_hours,
+        "metrics": [
+            {**m, "aggregation": aggregation_for_metric(m["key"]) if step_hours > 1 else None}
+            for m in meta
+        ],
+        "times": times,
+        "series": series,
+    }
+
+
+def lttb(points: Sequence[tuple], threshold: int) -> List[tuple]:
+    """Largest-Triangle-Three-Buckets downsampling of (x, y) points to `threshold` points."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def minmax_buckets(points: Sequence[tuple], threshold: int) -> List[tuple]:
+    """Keep each bucket's min and max point (in x order) so peaks survive; for precipitation."""
+    n = len(points)
+    buckets = max(1, threshold // 2)
+    if threshold >= n:
+        return list(points)
+    result = []
+    size = n / buckets
+    for b in range(buckets):
+        chunk = points[int(b * size):int((b + 1) * size)]
+        if not chunk:
+            continue
+        lo = min(chunk, key=lambda p: p[1])
+        hi = max(chunk, key=lambda p: p[1])
+        result.extend(sorted({lo, hi}))
+    return result
+
+
+def build_pyramid(location: Dict, min_points: int = 24) -> Dict:
+    """
+    Precompute downsampled levels of every metric series for one location.
+
+    Level 0 is the full hourly series; level k keeps ~length / 2**k points, stopping
+    once a level would drop below `min_points`. Each series is stored sparsely as
+    hourly indices "i" and values "v" so any level lines up with location["hourly"].
+    Accumulation metrics use min/max buckets, everything else LTTB.
+    """
+    hourly = location.get("hourly", [])
+    length = len(hourly)
+    full = {}
+    for m in location.get("metrics", []):
+        key = m["key"]
+        full[key] = [(i, e["metrics"].get(key)) for i, e in enumerate(hourly) if e["metrics"].get(key) is not None]
+
+    levels = []
+    target = length
+    level = 0
+    while True:
+        series = {}
+        for key, points in full.items():
+            if level == 0:
+                sampled = points
+            elif is_accumulation_metric(key):
+                sampled = minmax_buckets(points, target)
+            else:
+                sampled = lttb(points, target)
+            series[key] = {"i": [p[0] for p in sampled], "v": [p[1] for p in sampled]}
+        levels.append({"level": level, "points": target, "series": series})
+        target = -(-length // 2 ** (level + 1))
+        level += 1
+        if target < min_points:
+            break
+    return {"name": location["name"], "length": length, "levels": levels}
+
+
+def build_pyramids(snapshot: Dict) -> Dict[str, Dict]:
+    """Pyramids for every location of a snapshot, keyed by lower-cased name."""
+    return {loc["name"].lower(): build_pyramid(loc) for loc in snapshot.get("locations", [])}
+
+
+def pick_level(pyramid: Dict, width: int) -> int:
+    """Coarsest level that still has at least `width` points (level 0 if none do)."""
+    chosen = 0
+    for lvl in pyramid["levels"]:
+        if lvl["points"] >= width:
+            chosen = lvl["level"]
+    return chosen
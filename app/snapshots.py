@@ -0,0 +1,143 @@
+"""In-process access to the latest published locations.json snapshot.
+
+The NWS fetch loop publishes each snapshot here right after writing it to disk, so
+API routes can slice it without re-reading or re-parsing the file. When no fetcher
+runs in this process (e.g. web workers separate from the fetcher), the store falls
+back to loading the file and reloads it whenever its mtime changes.
+
+Derived responses can be memoised per snapshot with `cached()`; the memo is dropped
+as soon as a new snapshot is published. Heavier derivations registered with
+`add_derivation()` are instead computed eagerly, once per snapshot, by whoever
+publishes or loads it, so requests never pay for them.
+
+The last few snapshots are kept by "fetchedAt" so clients that already hold one
+can be sent a delta instead of the whole file (see delta.py).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from .serialize import get_serializer
+
+T = TypeVar("T")
+
+_stores: Dict[Path, "SnapshotStore"] = {}
+_stores_lock = threading.Lock()
+
+
+class SnapshotStore:
+    """Latest snapshot for one locations.json path, plus a per-snapshot response memo."""
+
+    def __init__(self, path: Path, max_cached: int = 256, keep: int = 8):
+        self.path = path
+        self.max_cached = max_cached
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict] = None
+        self._mtime: Optional[float] = None
+        self._published = False
+        self._cache: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._derivations: Dict[str, Callable[[Dict], object]] = {}
+        self._derived: Dict[str, object] = {}
+        self._recent: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def add_derivation(self, name: str, build: Callable[[Dict], object]) -> None:
+        """Compute build(snapshot) for every snapshot as it becomes current."""
+        with self._lock:
+            self._derivations[name] = build
+            snapshot = self._snapshot
+        if snapshot is not None:
+            value = build(snapshot)
+            with self._lock:
+                if snapshot is self._snapshot:
+                    self._derived[name] = value
+
+    def _derive(self, snapshot: Dict) -> Dict[str, object]:
+        with self._lock:
+            derivations = dict(self._derivations)
+        return {name: build(snapshot) for name, build in derivations.items()}
+
+    def _remember(self, snapshot: Dict) -> None:
+        # Caller holds the lock.
+        fetched_at = snapshot.get("fetchedAt")
+        if fetched_at:
+            self._recent[fetched_at] = snapshot
+            self._recent.move_to_end(fetched_at)
+            while len(self._recent) > self.keep:
+                self._recent.popitem(last=False)
+
+    def publish(self, snapshot: Dict) -> None:
+        """Make `snapshot` current (called by the fetcher after writing it to disk)."""
+        derived = self._derive(snapshot)
+        with self._lock:
+            self._snapshot = snapshot
+            self._derived = derived
+            self._published = True
+            self._remember(snapshot)
+            self._cache.clear()
+
+    def get(self) -> Optional[Dict]:
+        """Current snapshot, or None if nothing has been fetched yet."""
+        with self._lock:
+            if self._published:
+                return self._snapshot
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            if mtime == self._mtime:
+                return self._snapshot
+        snapshot = get_serializer().loads(self.path.read_bytes())
+        derived = self._derive(snapshot)
+        with self._lock:
+            if mtime != self._mtime:
+                self._snapshot = snapshot
+                self._derived = derived
+                self._mtime = mtime
+                self._remember(snapshot)
+                self._cache.clear()
+            return self._snapshot
+
+    def recent(self, fetched_at: str) -> Optional[Dict]:
+        """One of the last `keep` snapshots by its "fetchedAt", if still held."""
+        with self._lock:
+            return self._recent.get(fetched_at)
+
+    def derived(self, name: str) -> Optional[object]:
+        """The current snapshot's value for a registered derivation (None before any data)."""
+        if self.get() is None:
+            return None
+        with self._lock:
+            return self._derived.get(name)
+
+    def cached(self, key: Hashable, build: Callable[[Dict], T]) -> Optional[T]:
+        """Return build(snapshot), memoised under `key` until the next snapshot."""
+        snapshot = self.get()
+        if snapshot is None:
+            return None
+        with self._lock:
+            if snapshot is self._snapshot and key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = build(snapshot)
+        with self._lock:
+            if snapshot is self._snapshot:
+                self._cache[key] = value
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+        return value
+
+
+def get_store(path: str | Path) -> SnapshotStore:
+    """Shared store for a locations.json path (the fetcher and blueprint meet here)."""
+    resolved = Path(path).resolve()
+    with _stores_lock:
+        store = _stores.get(resolved)
+        if store is None:
+            store = _stores[resolved] = SnapshotStore(resolved)
+        return store
@@ -0,0 +1,87 @@
+"""Binary encoding of a locations.json snapshot for /data/locations.bin.
+
+Layout (all little-endian):
+
+    b"NWSB" | uint32 header length | header JSON (UTF-8, space-padded to 4 bytes) | float32 data
+
+The header is the snapshot with each location's "hourly" list replaced by
+"hours" (columns of the per-hour text fields: time, shortForecast, ...) and
+"series" ({metric key: start index into the float32 data}); every series has
+one value per hour, NaN where the JSON has null. The browser wraps each series in
+a Float32Array view over the response buffer instead of parsing decimal strings.
+Values are float32, so they round-trip to ~7 significant digits.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+import sys
+from array import array
+from typing import Dict, List
+
+MAGIC = b"NWSB"
+CONTENT_TYPE = "application/octet-stream"
+
+_HOUR_FIELDS = ("time", "shortForecast", "windDirection", "windSpeedText")
+
+
+def encode_snapshot(snapshot: Dict) -> bytes:
+    """Encode a snapshot into the binary wire format."""
+    data = array("f")
+    locations = []
+    for loc in snapshot.get("locations", []):
+        hourly = loc.get("hourly", [])
+        keys: Dict[str, None] = {}
+        for entry in hourly:
+            keys.update(dict.fromkeys(entry["metrics"]))
+        series = {}
+        for key in keys:
+            series[key] = len(data)
+            data.extend(
+                math.nan if entry["metrics"].get(key) is None else entry["metrics"][key]
+                for entry in hourly
+            )
+        header_loc = {k: v for k, v in loc.items() if k != "hourly"}
+        header_loc["hours"] = {field: [entry.get(field) for entry in hourly] for field in _HOUR_FIELDS}
+        header_loc["series"] = series
+        locations.append(header_loc)
+
+    header = json.dumps(
+        {**{k: v for k, v in snapshot.items() if k != "locations"}, "locations": locations},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 4)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return MAGIC + struct.pack("<I", len(header)) + header + data.tobytes()
+
+
+def decode_snapshot(payload: bytes) -> Dict:
+    """Inverse of encode_snapshot (missing values come back as None)."""
+    if payload[:4] != MAGIC:
+        raise ValueError("not an NWSB payload")
+    (header_len,) = struct.unpack_from("<I", payload, 4)
+    start = 8 + header_len
+    header = json.loads(payload[8:start])
+    data = array("f")
+    data.frombytes(payload[start:])
+    if sys.byteorder == "big":
+        data.byteswap()
+
+    locations: List[Dict] = []
+    for header_loc in header["locations"]:
+        loc = {k: v for k, v in header_loc.items() if k not in ("hours", "series")}
+        hours = header_loc["hours"]
+        hourly = []
+        for i in range(len(hours["time"])):
+            entry = {field: hours[field][i] for field in _HOUR_FIELDS}
+            entry["metrics"] = {
+                key: None if math.isnan(data[offset + i]) else data[offset + i]
+                for key, offset in header_loc["series"].items()
+            }
+            hourly.append(entry)
+        loc["hourly"] = hourly
+        locations.append(loc)
+    return {**{k: v for k, v in header.items() if k != "locations"}, "locations": locations}
@@ -4,6 +4,10 @@
 Subcommands:
     web              Start the web server (server-side mode by default)
     web --client     Client-only mode (serves static files, no background fetching)
+    loadtest         Load-test the serving path against a fixed snapshot on localhost
+    process RAW...   Run the NWS processing stage offline on saved raw payloads
+    bench-serialize  Time locations.json encoding per serializer backend
+    parity RAW...    Check grid-derived hourly periods against forecastHourly
 """
 
 import argparse
@@ -42,19 +46,126 @@ def main():
     web_parser.add_argument(
         "--port", type=int, default=8081, help="Port",
     )
+    web_parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Run the first NWS fetch cycle under cProfile and write stats to PATH",
+    )
+
+    load_parser = subparsers.add_parser(
+        "loadtest", help="Load-test the serving path against a fixed snapshot"
+    )
+    load_parser.add_argument(
+        "--snapshot",
+        default=str(PROJECT_ROOT / "server_side" / "data" / "locations.json"),
+        help="locations.json to serve (copied to a temporary data directory)",
+    )
+    load_parser.add_argument(
+        "--server", choices=["builtin", "gunicorn"], default="builtin",
+        help="builtin = Flask development server (app.run), gunicorn = production server",
+    )
+    load_parser.add_argument(
+        "--workers", type=int, default=4, help="gunicorn worker processes",
+    )
+    load_parser.add_argument(
+        "--url", help="Target an already running server instead of starting one",
+    )
+    load_parser.add_argument(
+        "--concurrency", default="1,4,16,64",
+        help="Comma-separated numbers of simulated dashboards",
+    )
+    load_parser.add_argument(
+        "--duration", type=float, default=15, help="Seconds per concurrency level",
+    )
+    load_parser.add_argument(
+        "--think-time", type=float, default=0,
+        help="Seconds each client waits between polls (0 = back-to-back)",
+    )
+    load_parser.add_argument(
+        "--mode", choices=["delta", "json"], default="delta",
+        help="delta = what the dashboard requests (binary snapshot, then delta polls), "
+        "json = poll the full locations.json",
+    )
+    load_parser.add_argument(
+        "--out", default="loadtest-results.json", help="Where to write JSON results",
+    )
+
+    process_parser = subparsers.add_parser(
+        "process", help="Process saved raw NWS payloads (e.g. example_data/sterling-raw.json)"
+    )
+    process_parser.add_argument("raw", nargs="+", help="Raw payload JSON files")
+    process_parser.add_argument(
+        "--workers", type=int, default=0,
+        help="Worker processes (0 = process in this process)",
+    )
+    process_parser.add_argument(
+        "--repeat", type=int, default=1,
+        help="Process each payload this many times (for throughput measurements)",
+    )
+    process_parser.add_argument(
+        "--out", help="Write the processed locations as a locations.json snapshot",
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench-serialize", help="Benchmark snapshot serialization against the indent=2 json.dump format"
+    )
+    bench_parser.add_argument(
+        "--snapshot",
+        default=str(PROJECT_ROOT / "server_side" / "data" / "locations.json"),
+        help="locations.json to encode",
+    )
+    bench_parser.add_argument(
+        "--scale", type=int, default=1,
+        help="Repeat the snapshot's locations this many times (larger location sets)",
+    )
+    bench_parser.add_argument("--repeat", type=int, default=5, help="Runs per format (best is reported)")
+    bench_parser.add_argument(
+        "--float-digits", type=int,
+        help="Also time rounding floats to this many decimals (default: SNAPSHOT_FLOAT_DIGITS)",
+    )
+
+    parity_parser = subparsers.add_parser(
+        "parity", help="Compare hourly periods derived from grid data with forecastHourly's"
+    )
+    parity_parser.add_argument("raw", nargs="+", help="Raw payload JSON files (e.g. example_data/sterling-raw.json)")
 
     args = parser.parse_args()
 
     if args.command == "web":
         if args.client:
+            from app.config import PROXY_CACHE_DIR, PROXY_CACHE_MAX_BYTES, PROXY_CACHE_SIZE
+
             app = Flask(__name__)
-            app.register_blueprint(create_blueprint(), url_prefix="/")
+            app.register_blueprint(
+                create_blueprint(
+                    config={
+                        "nws_proxy": True,
+                        "proxy_cache_size": PROXY_CACHE_SIZE,
+                        "proxy_cache_bytes": PROXY_CACHE_MAX_BYTES,
+                        "proxy_cache_dir": PROXY_CACHE_DIR,
+                    }
+                ),
+                url_prefix="/",
+            )
 
             print(f"Serving NWS dashboard at http://{args.host}:{args.port}")
             app.run(host=args.host, port=args.port)
         else:
             from app.background import start_background_tasks
-            from app.config import ENABLE_HRRR, NWS_INTERVAL_SECONDS
+            from app.config import (
+                ENABLE_DEBUG_ROUTES,
+                ENABLE_DEMAND_REFRESH,
+                ENABLE_GRID_RESOLVER,
+                ENABLE_HISTORY,
+                ENABLE_HRRR,
+                GRID_RESOLVER_FILE,
+                HISTORY_DB,
+                NWS_HOURLY_FROM_GRID,
+                NWS_INTERVAL_SECONDS,
+                POINT_CACHE_SIZE,
+                POINT_CACHE_TTL_SECONDS,
+                PROFILE_PATH,
+            )
 
             app = Flask(__name__)
             app.register_blueprint(
@@ -62,6 +173,13 @@ def main():
                     config={
                         "server_side": True,
                         "data_dir": str(PROJECT_ROOT / "server_side" / "data"),
+                        "debug_routes": ENABLE_DEBUG_ROUTES,
+                        "history_db": HISTORY_DB if ENABLE_HISTORY else None,
+                        "point_cache_size": POINT_CACHE_SIZE,
+                        "point_cache_ttl": POINT_CACHE_TTL_SECONDS,
+                        "grid_resolver_file": GRID_RESOLVER_FILE if ENABLE_GRID_RESOLVER else None,
+                        "hourly_from_grid": NWS_HOURLY_FROM_GRID,
+                        "demand": ENABLE_DEMAND_REFRESH,
                     }
                 ),
                 url_prefix="/",
@@ -72,7 +190,9 @@ def main():
                 parents=True, exist_ok=True
             )
 
-            stop_event, threads = start_background_tasks()
+            stop_event, threads = start_background_tasks(
+                profile_path=args.profile or PROFILE_PATH
+            )
 
             print("[Server] Waiting for initial NWS fetch...")
             time.sleep(2)
@@ -89,6 +209,92 @@ def main():
                 for t in threads:
                     t.join(timeout=2)
                 print("[Server] Stopped")
+    elif args.command == "loadtest":
+        from app.loadtest import run
+
+        run(
+            Path(args.snapshot),
+            server=args.server,
+            concurrency=[int(n) for n in args.concurrency.split(",")],
+            duration=args.duration,
+            think_time=args.think_time,
+            workers=args.workers,
+            url=args.url,
+            out=Path(args.out),
+            mode=args.mode,
+        )
+    elif args.command == "process":
+        import json
+        from concurrent.futures import ProcessPoolExecutor
+        from datetime import datetime, timezone
+
+        from app.config import SNAPSHOT_FLOAT_DIGITS
+        from app.nws_fetcher import process_saved
+        from app.serialize import stream_snapshot
+
+        raws = []
+        for path in args.raw:
+            with open(path, "r", encoding="utf-8") as f:
+                raws.append(json.load(f))
+        work = raws * args.repeat
+
+        pool = ProcessPoolExecutor(args.workers) if args.workers > 0 else None
+        start = time.perf_counter()
+        try:
+            results = process_saved(work, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"Processed {len(results)} payloads in {elapsed:.2f}s "
+            f"({len(results) / elapsed:.1f}/s, workers={args.workers})"
+        )
+        for loc in results[: len(raws)]:
+            print(f"  {loc['name']}: {len(loc['hourly'])} hours, {len(loc['metrics'])} metrics")
+        if args.out:
+            snapshot = {
+                "fetchedAt": datetime.now(timezone.utc).isoformat(),
+                "locations": results[: len(raws)],
+            }
+            with open(args.out, "wb") as f:
+                stream_snapshot(snapshot, f, float_digits=SNAPSHOT_FLOAT_DIGITS)
+    elif args.command == "bench-serialize":
+        import json
+
+        from app.config import SNAPSHOT_FLOAT_DIGITS
+        from app.serialize import benchmark
+
+        with open(args.snapshot, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        snapshot["locations"] = snapshot["locations"] * args.scale
+        print(f"{len(snapshot['locations'])} locations, best of {args.repeat}:")
+        digits = SNAPSHOT_FLOAT_DIGITS if args.float_digits is None else args.float_digits
+        for result in benchmark(snapshot, repeat=args.repeat, float_digits=digits):
+            print(
+                f"  {result['format']:<32} {result['seconds'] * 1000:8.1f} ms  {result['speedup']:5.2f}x"
+                f"  {result['bytes'] / 1024:9.1f} KB  ({result['sizeRatio']:.0%} of baseline)"
+            )
+    elif args.command == "parity":
+        import json
+
+        from app.nws_fetcher import hourly_parity
+
+        failed = False
+        for path in args.raw:
+            with open(path, "r", encoding="utf-8") as f:
+                result = hourly_parity(json.load(f))
+            print(
+                f"{path}: {result['hours']} common hours, "
+                f"{len(result['onlyHourly'])} only in forecastHourly, {len(result['onlyGrid'])} only derived"
+            )
+            for field, rows in result["mismatches"].items():
+                failed = True
+                print(f"  {field}: {len(rows)} mismatches")
+                for t, expected, derived in rows[:5]:
+                    print(f"    {t}: {expected!r} != {derived!r}")
+        sys.exit(1 if failed else 0)
     else:
         parser.print_help()
 
@@ -1,4 +1,5 @@
-// Server-side version - loads pre-fetched data from /data/locations.json
+// Server-side version - loads pre-fetched data from /data/locations.bin (or .json), then polls
+// /data/locations.delta for changes
 
 const state = {
   selectedIndex: 0,
@@ -7,7 +8,8 @@ const state = {
   startIndex: 0,
   metricVisibility: {},
   lastChecked: null,
-  serverFetchedAt: null
+  serverFetchedAt: null,
+  serverSnapshot: null
 };
 
 const MIN_WINDOW = 6; // minimum zoom window in hours
@@ -81,6 +83,14 @@ const chartScene = {
   instances: []
 };
 
+// Downsampled series levels from /data/series, per snapshot: name -> level sizes / level data.
+const seriesLevels = {
+  fetchedAt: null,
+  sizes: new Map(),
+  data: new Map(),
+  pending: new Set()
+};
+
 function getGroupForMetric(metric) {
   const key = metric.key.toLowerCase();
   const unit = (metric.unit || "").toLowerCase();
@@ -727,6 +737,7 @@ function selectLocation(index) {
   state.selectedIndex = index;
   state.startIndex = 0;
   localStorage.setItem("selectedLocation", state.data[index]?.name || "");
+  reportViewing(state.data[index]?.name);
   renderLocations();
   ensureMetricVisibility(state.data[index]);
   updateSliders();
@@ -755,9 +766,13 @@ function renderView(options = {}) {
   locationNameEl.textContent = loc.name;
   const checkedLine = formatTimestamp(state.lastChecked, "Checked");
   const latestLine = formatTimestamp(loc.updated, "Latest");
+  const staleLine = loc.stale
+    ? `<span class="meta-line">${formatTimestamp(loc.lastSuccess, "Refresh failed; showing data from")}</span>`
+    : "";
   locationMetaEl.innerHTML = `
     <span class="meta-line">${checkedLine}</span>
     <span class="meta-line">${latestLine}</span>
+    ${staleLine}
   `;
 
   if (windowData.length) {
@@ -773,10 +788,51 @@ function renderView(options = {}) {
 function buildFullSeries(location) {
   return location.metrics.map((meta) => ({
     ...meta,
-    values: location.hourly.map((entry) => entry.metrics[meta.key])
+    values: location.columns?.[meta.key]
+      ? Array.from(location.columns[meta.key], (value) => (Number.isNaN(value) ? null : value))
+      : location.hourly.map((entry) => entry.metrics[meta.key])
   }));
 }
 
+// Coarsest cached level with at least `needed` points; kicks off a fetch for a better one.
+function getSeriesLevel(location, needed) {
+  if (needed >= location.hourly.length) return null;
+  if (seriesLevels.fetchedAt !== state.serverFetchedAt) {
+    seriesLevels.fetchedAt = state.serverFetchedAt;
+    seriesLevels.sizes.clear();
+    seriesLevels.data.clear();
+  }
+  const name = location.name;
+  const sizes = seriesLevels.sizes.get(name);
+  let level = null;
+  if (sizes) {
+    level = 0;
+    sizes.forEach((points, index) => {
+      if (points >= needed) level = index;
+    });
+    if (level === 0) return null;
+    const cached = seriesLevels.data.get(`${name}|${level}`);
+    if (cached) return cached;
+  }
+
+  const query = level === null ? `width=${needed}` : `level=${level}`;
+  const key = `${name}|${query}`;
+  if (!seriesLevels.pending.has(key)) {
+    seriesLevels.pending.add(key);
+    fetch(`data/series/${encodeURIComponent(name)}?${query}`)
+      .then((response) => (response.ok ? response.json() : null))
+      .then((payload) => {
+        if (!payload || payload.fetchedAt !== state.serverFetchedAt) return;
+        seriesLevels.sizes.set(name, payload.levels);
+        seriesLevels.data.set(`${name}|${payload.level}`, payload);
+        if (chartScene.locationName === name) renderCharts(state.data[state.selectedIndex], false);
+      })
+      .catch(() => {})
+      .finally(() => seriesLevels.pending.delete(key));
+  }
+  return null;
+}
+
 function renderCharts(location, rebuild = true) {
   if (!location) return;
   const needsRebuild = rebuild || chartScene.locationName !== location.name || !chartScene.instances.length;
@@ -928,7 +984,9 @@ function buildOverlayScene(series, location) {
       times: location.hourly.map((entry) => entry.time),
       extent: fixedExtent,
       yValues: new Map(),
+      sampledY: new Map(),
       lastNonNull: new Map(),
+      sampled: null,
       layout: null
     };
 
@@ -948,17 +1006,23 @@ function buildOverlayPaths(instance, layout) {
   const { padding, chartHeight } = layout;
 
   instance.yValues.clear();
+  instance.sampledY.clear();
   instance.lastNonNull.clear();
   series.forEach((metric) => {
     const ext = unitExtents?.get(metric.unit || "unitless") ?? extent;
     const { min, max } = normalizeExtent(ext?.min ?? 0, ext?.max ?? 1, metric.unit || instance.unit, instance.groupId);
     const range = max - min || 1;
-    const yPositions = metric.values.map((value) => {
+    const toY = (value) => {
       if (value === null || value === undefined) return null;
       const yRatio = (value - min) / range;
       return padding.top + chartHeight - yRatio * chartHeight;
-    });
+    };
+    const yPositions = metric.values.map(toY);
     instance.yValues.set(metric.key, yPositions);
+    const sampled = instance.sampled?.series[metric.key];
+    if (sampled) {
+      instance.sampledY.set(metric.key, { indices: sampled.i, ys: sampled.v.map(toY) });
+    }
     let lastIndex = -1;
     for (let i = yPositions.length - 1; i >= 0; i -= 1) {
       if (yPositions[i] !== null && yPositions[i] !== undefined) {
@@ -985,7 +1049,12 @@ function drawOverlayInstance(instance) {
     layout.height !== height ||
     layout.chartWidth !== chartWidth ||
     layout.chartHeight !== chartHeight;
-  if (sizeChanged) {
+  // With more hours in the window than pixels, draw a downsampled level instead.
+  const location = state.data[state.selectedIndex];
+  const needed = Math.ceil((chartWidth * times.length) / Math.max(1, state.windowSize));
+  const sampled = location ? getSeriesLevel(location, needed) : null;
+  if (sizeChanged || sampled !== instance.sampled) {
+    instance.sampled = sampled;
     instance.layout = { width, height, chartWidth, chartHeight, padding };
     buildOverlayPaths(instance, instance.layout);
   }
@@ -1080,12 +1149,16 @@ function drawOverlayInstance(instance) {
     const seriesClampStart = 0;
     const seriesClampEnd = Math.min(yPositions.length, lastNon + 1);
     const overscrollOffsetX = (-chartWidth * offset) / span;
+    const sampledY = instance.sampledY.get(metric.key);
+    const count = sampledY ? sampledY.indices.length : seriesClampEnd;
     const path = new Path2D();
     let started = false;
     let points = 0;
     let lastPoint = null;
-    for (let i = seriesClampStart; i < seriesClampEnd; i += 1) {
-      const y = yPositions[i];
+    for (let k = seriesClampStart; k < count; k += 1) {
+      const i = sampledY ? sampledY.indices[k] : k;
+      if (i >= seriesClampEnd) break;
+      const y = sampledY ? sampledY.ys[k] : yPositions[i];
       if (y === null || y === undefined) {
         started = false;
         continue;
@@ -1193,14 +1266,133 @@ function processServerData(serverData) {
   });
 }
 
+// Apply a /data/locations.delta payload to the raw snapshot it was computed against.
+function applyDelta(snapshot, delta) {
+  const previous = new Map(snapshot.locations.map((loc) => [loc.name, loc]));
+  const locations = delta.locations.map((change) => {
+    if (change.full) return change.full;
+    if (!previous.has(change.name)) throw new Error(`Delta for unknown location ${change.name}`);
+    const prior = withHourlyMetrics(previous.get(change.name));
+    const loc = { ...prior };
+    let hourly = prior.hourly.slice(change.drop || 0);
+    (change.changes || []).forEach(([index, fields]) => {
+      const entry = { ...hourly[index], ...fields };
+      if (fields.metrics) entry.metrics = { ...hourly[index].metrics, ...fields.metrics };
+      hourly[index] = entry;
+    });
+    if (change.append) hourly = hourly.concat(change.append);
+    loc.hourly = hourly;
+    if (change.daily) {
+      const daily = (prior.dailyForecast || []).slice(0, change.daily.length);
+      Object.entries(change.daily.cards).forEach(([index, card]) => {
+        daily[Number(index)] = card;
+      });
+      loc.dailyForecast = daily;
+    }
+    Object.assign(loc, change.set || {});
+    (change.unset || []).forEach((key) => delete loc[key]);
+    return loc;
+  });
+  return { fetchedAt: delta.fetchedAt, locations };
+}
+
+const littleEndian = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+
+// Decode /data/locations.bin (see app/wire.py) into the locations.json shape, except that
+// metric values stay in `columns`: Float32Array views over the response buffer (NaN = missing)
+// instead of per-hour `metrics` objects.
+function decodeBinarySnapshot(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== "NWSB") throw new Error("Unexpected binary snapshot format");
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+  const dataStart = 8 + headerLength;
+
+  const locations = header.locations.map(({ hours, series, ...loc }) => {
+    const count = hours.time.length;
+    const columns = {};
+    Object.entries(series).forEach(([key, offset]) => {
+      columns[key] = new Float32Array(buffer, dataStart + offset * 4, count);
+    });
+    const hourly = hours.time.map((time, i) => ({
+      time,
+      shortForecast: hours.shortForecast[i],
+      windDirection: hours.windDirection[i],
+      windSpeedText: hours.windSpeedText[i]
+    }));
+    return { ...loc, hourly, columns };
+  });
+  return { ...header, locations };
+}
+
+// Per-hour `metrics` objects for a location decoded from the binary format.
+function withHourlyMetrics(location) {
+  if (!location.columns) return location;
+  const { columns, ...loc } = location;
+  const keys = Object.keys(columns);
+  loc.hourly = location.hourly.map((entry, i) => {
+    const metrics = {};
+    keys.forEach((key) => {
+      metrics[key] = Number.isNaN(columns[key][i]) ? null : columns[key][i];
+    });
+    return { ...entry, metrics };
+  });
+  return loc;
+}
+
+function reportViewing(name) {
+  if (name && navigator.sendBeacon) {
+    navigator.sendBeacon(`api/viewing?location=${encodeURIComponent(name)}`);
+  }
+}
+
+// Tell the server which location this dashboard shows, so it keeps that one fresh.
+function viewingQuery() {
+  const name = state.data[state.selectedIndex]?.name || localStorage.getItem("selectedLocation");
+  return name ? `viewing=${encodeURIComponent(name)}` : "";
+}
+
+async function fetchFullSnapshot() {
+  const query = viewingQuery();
+  if (littleEndian) {
+    try {
+      const response = await fetch(`data/locations.bin?${query}`);
+      if (response.ok) return decodeBinarySnapshot(await response.arrayBuffer());
+    } catch (err) {
+      console.warn("Binary snapshot unavailable, using JSON:", err);
+    }
+  }
+  const response = await fetch(`data/locations.json?${query}`);
+  if (!response.ok) {
+    throw new Error(`Failed to load data: ${response.status}`);
+  }
+  return response.json();
+}
+
+// Once we hold a snapshot, ask only for what changed since it.
+async function fetchSnapshot() {
+  if (!state.serverSnapshot) return fetchFullSnapshot();
+  try {
+    const since = encodeURIComponent(state.serverSnapshot.fetchedAt);
+    const response = await fetch(`data/locations.delta?since=${since}&${viewingQuery()}`);
+    if (!response.ok) throw new Error(`Delta request failed: ${response.status}`);
+    const payload = await response.json();
+    if (payload.type === "unchanged") return state.serverSnapshot;
+    if (payload.type === "full") return payload;
+    return applyDelta(state.serverSnapshot, payload);
+  } catch (err) {
+    console.warn("Falling back to full snapshot:", err);
+    return fetchFullSnapshot();
+  }
+}
+
 async function loadAll() {
   try {
     state.lastChecked = new Date();
-    const response = await fetch("data/locations.json");
-    if (!response.ok) {
-      throw new Error(`Failed to load data: ${response.status}`);
-    }
-    const serverData = await response.json();
+    const reported = viewingQuery() !== "";
+    const serverData = await fetchSnapshot();
+    state.serverSnapshot = serverData;
     state.serverFetchedAt = serverData.fetchedAt;
     state.data = processServerData(serverData);
 
@@ -1211,6 +1403,7 @@ async function loadAll() {
         state.selectedIndex = matchIndex;
       }
     }
+    if (!reported) reportViewing(state.data[state.selectedIndex]?.name);
     ensureMetricVisibility(state.data[state.selectedIndex]);
     renderLocations();
     updateSliders();
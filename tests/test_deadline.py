@@ -0,0 +1,83 @@
+"""Deadline budgets, hedging and latency percentiles (app/deadline.py)."""
+
+import threading
+import time
+
+import pytest
+
+from app.deadline import Deadline, DeadlineExceeded, LatencyTracker
+
+
+def test_latency_threshold_needs_min_samples():
+    tracker = LatencyTracker(quantile=0.9, min_samples=10)
+    for i in range(9):
+        tracker.record("grid", i + 1)
+    assert tracker.threshold("grid") is None
+
+    tracker.record("grid", 10)
+    assert tracker.threshold("grid") == 9
+    assert tracker.threshold("points") is None
+
+
+def test_latency_window_keeps_recent_samples():
+    tracker = LatencyTracker(quantile=1.0, window=5, min_samples=1)
+    for seconds in (100, 1, 1, 1, 1, 1):
+        tracker.record("grid", seconds)
+    assert tracker.threshold("grid") == 1
+
+
+def test_child_ends_no_later_than_parent():
+    parent = Deadline(1)
+    assert parent.child(60).at == parent.at
+    assert parent.child(0.1).at < parent.at
+    assert Deadline().child(None).remaining() == float("inf")
+
+
+def test_timeout_is_capped_and_raises_once_spent():
+    deadline = Deadline(0.5)
+    assert deadline.timeout(30) <= 0.5
+    assert deadline.timeout(0.1) == 0.1
+
+    with pytest.raises(DeadlineExceeded):
+        Deadline(-1).timeout(30)
+
+
+def test_call_without_limits_runs_inline():
+    caller = threading.current_thread()
+    assert Deadline().call("grid", lambda timeout: (timeout, threading.current_thread()), 30) == (30, caller)
+
+
+def test_call_abandons_request_at_deadline():
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0.2).call("grid", lambda timeout: time.sleep(1), 30)
+    assert time.monotonic() - start < 0.8
+
+
+def test_call_passes_errors_through():
+    def fail(timeout):
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError, match="bad payload"):
+        Deadline(5).call("grid", fail, 30)
+
+
+def test_slow_request_is_hedged():
+    tracker = LatencyTracker(quantile=0.5, min_samples=1)
+    tracker.record("grid", 0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def request(timeout):
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        if first:
+            time.sleep(1)
+            return "slow"
+        return "hedged"
+
+    start = time.monotonic()
+    assert Deadline(5, tracker).call("grid", request, 30) == "hedged"
+    assert time.monotonic() - start < 0.8
+    assert len(calls) == 2
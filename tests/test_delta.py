@@ -0,0 +1,92 @@
+"""Snapshot deltas (app/delta.py) applied the way server_side/app.js applyDelta does."""
+
+import copy
+
+from app.delta import snapshot_delta
+
+
+def apply_delta(snapshot, delta):
+    """Python port of applyDelta in server_side/app.js."""
+    previous = {loc["name"]: loc for loc in snapshot["locations"]}
+    locations = []
+    for change in delta["locations"]:
+        if "full" in change:
+            locations.append(change["full"])
+            continue
+        prior = previous[change["name"]]
+        loc = dict(prior)
+        hourly = list(prior["hourly"][change.get("drop", 0):])
+        for index, fields in change.get("changes", []):
+            entry = {**hourly[index], **fields}
+            if "metrics" in fields:
+                entry["metrics"] = {**hourly[index]["metrics"], **fields["metrics"]}
+            hourly[index] = entry
+        loc["hourly"] = hourly + change.get("append", [])
+        if "daily" in change:
+            daily = list(prior.get("dailyForecast", [])[:change["daily"]["length"]])
+            for index, card in change["daily"]["cards"].items():
+                if int(index) < len(daily):
+                    daily[int(index)] = card
+                else:
+                    daily.append(card)
+            loc["dailyForecast"] = daily
+        loc.update(change.get("set", {}))
+        for key in change.get("unset", []):
+            loc.pop(key, None)
+        locations.append(loc)
+    return {"fetchedAt": delta["fetchedAt"], "locations": locations}
+
+
+def hour(h, temperature, text="Sunny"):
+    return {
+        "time": f"2026-01-30T{h:02d}:00:00+00:00",
+        "shortForecast": text,
+        "windDirection": "NW",
+        "windSpeedText": "10 mph",
+        "metrics": {"temperature": temperature, "windSpeed": 10.0},
+    }
+
+
+def location(name, hours, daily, **fields):
+    return {"name": name, "hourly": hours, "dailyForecast": daily, "updated": "2026-01-30T00:00:00+00:00", **fields}
+
+
+OLD = {
+    "fetchedAt": "2026-01-30T00:00:00+00:00",
+    "locations": [
+        location("Sterling, VA", [hour(h, 30.0 + h) for h in range(5)], [{"name": "Today"}, {"name": "Tonight"}],
+                 stale=True),
+        location("Hatteras, NC", [hour(h, 50.0) for h in range(3)], [{"name": "Today"}]),
+    ],
+}
+
+
+def test_sliding_window_round_trips():
+    new = copy.deepcopy(OLD)
+    new["fetchedAt"] = "2026-01-30T02:00:00+00:00"
+    sterling = new["locations"][0]
+    sterling["hourly"] = [hour(h, 30.0 + h) for h in range(2, 7)]
+    sterling["hourly"][1] = hour(3, 99.5, "Snow")
+    sterling["dailyForecast"] = [{"name": "Today", "detail": "colder"}, {"name": "Tonight"}, {"name": "Friday"}]
+    sterling["updated"] = "2026-01-30T02:00:00+00:00"
+    del sterling["stale"]
+
+    delta = snapshot_delta(OLD, new)
+    change = delta["locations"][0]
+    assert change["drop"] == 2 and len(change["append"]) == 2
+    assert change["changes"] == [[1, {"shortForecast": "Snow", "metrics": {"temperature": 99.5}}]]
+    assert change["unset"] == ["stale"]
+    assert delta["locations"][1] == {"name": "Hatteras, NC"}
+
+    assert apply_delta(OLD, delta) == new
+
+
+def test_misaligned_and_new_locations_are_sent_in_full():
+    new = copy.deepcopy(OLD)
+    new["locations"][0]["hourly"] = [hour(h, 1.0) for h in range(0, 10, 2)]
+    new["locations"].append(location("Frederick, MD", [hour(0, 20.0)], []))
+
+    delta = snapshot_delta(OLD, new)
+    assert "full" in delta["locations"][0]
+    assert delta["locations"][2]["full"]["name"] == "Frederick, MD"
+    assert apply_delta(OLD, delta) == new
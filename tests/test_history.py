@@ -0,0 +1,63 @@
+"""Forecast archive blocks and queries (app/history.py)."""
+
+import math
+
+from app.history import ForecastArchive, decode_block, encode_block
+
+
+def test_block_round_trip_keeps_missing_values():
+    values = [1.5, None, -2.25, 0.0, float("nan"), 1000.0, None]
+    assert decode_block(encode_block(values)) == [1.5, None, -2.25, 0.0, None, 1000.0, None]
+
+
+def test_block_stores_float32():
+    (value,) = decode_block(encode_block([0.1]))
+    assert math.isclose(value, 0.1, rel_tol=1e-7)
+    assert decode_block(encode_block([])) == []
+
+
+def snapshot(fetched, issued, start_hour, temperatures):
+    return {
+        "fetchedAt": fetched,
+        "locations": [{
+            "name": "Sterling, VA",
+            "updated": issued,
+            "metrics": [{"key": "temperature"}],
+            "hourly": [
+                {"time": f"2026-01-30T{start_hour + i:02d}:00:00+00:00", "metrics": {"temperature": t}}
+                for i, t in enumerate(temperatures)
+            ],
+        }],
+    }
+
+
+def test_run_to_run_change_aligns_offset_start_hours(tmp_path):
+    archive = ForecastArchive(tmp_path / "history.sqlite3")
+    assert archive.append_snapshot(
+        snapshot("2026-01-30T00:10:00Z", "2026-01-30T00:00:00Z", 0, [30.0, 31.0, 32.0, 33.0])
+    ) == 1
+    # Next issuance starts two hours later and has a gap.
+    assert archive.append_snapshot(
+        snapshot("2026-01-30T02:10:00Z", "2026-01-30T02:00:00Z", 2, [34.0, None, 36.0, 37.0])
+    ) == 1
+
+    change = archive.run_to_run_change("Sterling, VA", "temperature")
+    assert change["issued"] == "2026-01-30T02:00:00+00:00"
+    assert change["previousIssued"] == "2026-01-30T00:00:00+00:00"
+    assert [(c["previous"], c["current"], c["delta"]) for c in change["changes"]] == [
+        (32.0, 34.0, 2.0),
+        (33.0, None, None),
+        (None, 36.0, None),
+        (None, 37.0, None),
+    ]
+
+    # Naive times are UTC.
+    forecasts = archive.forecasts_for_valid_time("Sterling, VA", "temperature", "2026-01-30T03:00")
+    assert [(f["leadHours"], f["value"]) for f in forecasts] == [(3.0, 33.0), (1.0, None)]
+
+
+def test_refetching_an_issuance_adds_nothing(tmp_path):
+    archive = ForecastArchive(tmp_path / "history.sqlite3")
+    first = snapshot("2026-01-30T00:10:00Z", "2026-01-30T00:00:00Z", 0, [30.0])
+    assert archive.append_snapshot(first) == 1
+    assert archive.append_snapshot({**first, "fetchedAt": "2026-01-30T00:40:00Z"}) == 0
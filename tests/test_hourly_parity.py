@@ -0,0 +1,56 @@
+"""Hourly periods derived from gridpoint data must match forecastHourly's (NWS_HOURLY_FROM_GRID)."""
+
+import json
+from pathlib import Path
+
+from app.grids import GridResolver
+from app.nws_fetcher import hourly_parity
+
+EXAMPLE_DATA = Path(__file__).resolve().parent.parent / "example_data"
+
+
+def _sterling_raw():
+    with open(EXAMPLE_DATA / "sterling-raw.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _assert_parity(raw):
+    result = hourly_parity(raw)
+    assert result["hours"] >= 150
+    assert result["mismatches"] == {}
+    assert result["onlyHourly"] == []
+
+
+def test_grid_hourly_matches_forecast_hourly():
+    _assert_parity(_sterling_raw())
+
+
+def test_grid_hourly_matches_with_offline_resolved_point():
+    raw = _sterling_raw()
+    lat, lon = raw["location"]["lat"], raw["location"]["lon"]
+    hourly = raw["forecastHourly"]
+    hourly = json.loads(hourly) if isinstance(hourly, (str, bytes)) else hourly
+    props = raw["point"]["properties"]
+
+    resolver = GridResolver()
+    resolver.learn_point(lat, lon, raw["point"])
+    resolver.observe(lat, lon, {
+        "gridId": props["gridId"], "gridX": props["gridX"], "gridY": props["gridY"],
+        "cell": hourly["geometry"]["coordinates"][0],
+    })
+    point = resolver.resolve(lat, lon)
+
+    assert point["properties"]["resolvedOffline"]
+    assert point["properties"]["timeZone"] == props["timeZone"]
+    _assert_parity({**raw, "point": point})
+
+
+def test_resolver_asks_api_without_time_zone():
+    raw = _sterling_raw()
+    lat, lon = raw["location"]["lat"], raw["location"]["lon"]
+    point = {"properties": {k: v for k, v in raw["point"]["properties"].items() if k != "timeZone"}}
+
+    resolver = GridResolver()
+    resolver.learn_point(lat, lon, point)
+
+    assert resolver.resolve(lat, lon) is None
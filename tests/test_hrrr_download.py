@@ -0,0 +1,93 @@
+"""GRIB2 download verification and resume in hrrr_nbm_dl._download_if_needed."""
+
+import pytest
+import requests
+
+from app.hrrr_nbm_dl import DownloadVerificationError, _download_if_needed, _read_manifest
+
+URL = "https://nomads.example/filter?file=test.grib2"
+
+
+def grib_message(payload: bytes = b"\x00" * 32) -> bytes:
+    length = 16 + len(payload) + 4
+    return b"GRIB\x00\x00\x00\x02" + length.to_bytes(8, "big") + payload + b"7777"
+
+
+class FakeRaw:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, amt, decode_content=None):
+        assert decode_content is False
+        for i in range(0, len(self.body), 16):
+            yield self.body[i:i + 16]
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status_code: int = 200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = FakeRaw(body)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, stream=False, timeout=None, headers=None):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+def test_truncated_body_is_kept_and_resumed_with_range(tmp_path):
+    body = grib_message() + grib_message(b"\x01" * 48)
+    out = tmp_path / "subset.grib2"
+    cut = 40
+    session = FakeSession(
+        FakeResponse(body[:cut], headers={"Content-Length": str(len(body))}),
+        FakeResponse(
+            body[cut:], status_code=206,
+            headers={"Content-Range": f"bytes {cut}-{len(body) - 1}/{len(body)}"},
+        ),
+    )
+
+    with pytest.raises(DownloadVerificationError, match="incomplete"):
+        _download_if_needed(URL, out, session)
+    assert not out.exists()
+    assert out.with_suffix(".grib2.part").stat().st_size == cut
+
+    assert _download_if_needed(URL, out, session, expected_messages=2) == out
+    assert session.requests[0] == {"Accept-Encoding": "identity"}
+    assert session.requests[1]["Range"] == f"bytes={cut}-"
+    assert out.read_bytes() == body
+    manifest = _read_manifest(out)
+    assert manifest["verified"] and manifest["messages"] == 2 and manifest["size"] == len(body)
+
+
+def test_html_error_body_is_rejected(tmp_path):
+    html = b"<html><body>Service temporarily unavailable</body></html>"
+    out = tmp_path / "subset.grib2"
+    session = FakeSession(FakeResponse(html, headers={"Content-Length": str(len(html))}))
+
+    with pytest.raises(DownloadVerificationError, match="no GRIB header"):
+        _download_if_needed(URL, out, session)
+    assert not out.exists()
+    assert not out.with_suffix(".grib2.part").exists()
+
+
+def test_verified_cache_skips_the_request(tmp_path):
+    out = tmp_path / "subset.grib2"
+    _download_if_needed(URL, out, FakeSession(FakeResponse(grib_message())))
+
+    assert _download_if_needed(URL, out, FakeSession()) == out